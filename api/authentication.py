@@ -0,0 +1,130 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api.metrics import AUTH_CACHE_LOOKUPS
+
+# bump when the cached User / Subscription layout changes
+CACHE_VERSION = 1
+
+_local = OrderedDict()  # user_id -> (expires_at, pickled user)
+_lock = threading.Lock()
+_stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def _key(user_id):
+    return f"auth:user:{CACHE_VERSION}:{user_id}"
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+    AUTH_CACHE_LOOKUPS.labels(result=name).inc()
+
+
+def auth_cache_stats():
+    """Hit / miss counters of this process."""
+    with _lock:
+        return dict(_stats)
+
+
+def invalidate_user(user_id):
+    """Drop ``user_id`` from the local and shared caches (called by api.signals).
+
+    Other processes keep their local copy for at most AUTH_USER_CACHE_LOCAL_TTL seconds.
+    Inside a transaction it runs again on commit, so a request reading the old row in
+    the meantime cannot leave it cached.
+    """
+    def drop():
+        with _lock:
+            _local.pop(str(user_id), None)
+        caches[settings.AUTH_USER_CACHE_ALIAS].delete(_key(user_id))
+
+    if not settings.AUTH_USER_CACHE:
+        return
+    drop()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(drop)
+
+
+def _query(user_model, user_id):
+    return user_model.objects.select_related("subscription").get(**{api_settings.USER_ID_FIELD: user_id})
+
+
+def _load(user_model, user_id):
+    user = _query(user_model, user_id)
+    sub = getattr(user, "subscription", None)
+    if sub is not None:
+        # api.signals re-reads the stored values before a save instead of trusting a cached copy
+        sub.__dict__.pop("_loaded_values", None)
+    return pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+
+
+def get_cached_user(user_model, user_id):
+    """The user with its subscription (``user.subscription`` needs no query), as a fresh
+    copy from the process-local cache, the shared cache or the database. Without
+    settings.AUTH_USER_CACHE (no shared cache to invalidate) it is always read from the database."""
+    if not settings.AUTH_USER_CACHE:
+        _count("misses")
+        return _query(user_model, user_id)
+    user_id = str(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _local.get(user_id)
+        if entry and entry[0] > now:
+            _local.move_to_end(user_id)
+            _stats["local_hits"] += 1
+            AUTH_CACHE_LOOKUPS.labels(result="local_hits").inc()
+            return pickle.loads(entry[1])
+
+    cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+    data = cache.get(_key(user_id))
+    if data is not None:
+        _count("shared_hits")
+    else:
+        _count("misses")
+        data = _load(user_model, user_id)
+        cache.set(_key(user_id), data, settings.AUTH_USER_CACHE_TIMEOUT)
+
+    if settings.AUTH_USER_CACHE_LOCAL_TTL > 0:
+        with _lock:
+            _local[user_id] = (now + settings.AUTH_USER_CACHE_LOCAL_TTL, data)
+            _local.move_to_end(user_id)
+            while len(_local) > settings.AUTH_USER_CACHE_LOCAL_SIZE:
+                _local.popitem(last=False)
+    return pickle.loads(data)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication resolving the user (and its subscription) from get_cached_user()
+    instead of one or two queries per request."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(self.user_model, user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if getattr(api_settings, "CHECK_REVOKE_TOKEN", False):
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from django.db import connections
+
+from api.db_router import replica_enabled
+
+# cache backends whose entries only live in the process that wrote them
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def replica_sticky_cache(app_configs, **kwargs):
+    """Read-your-writes after a write (api.db_router.mark_sticky) is kept in the default
+    cache: with a replica, every worker must see it, or a user who just wrote can be
+    served stale rows by another worker."""
+    if not replica_enabled() or settings.CACHES["default"]["BACKEND"] not in PER_PROCESS_CACHES:
+        return []
+    # a test mirror reads the primary itself: nothing can be stale
+    if connections[settings.REPLICA_DATABASE].settings_dict["NAME"] == connections["default"].settings_dict["NAME"]:
+        return []
+    return [Error(
+        "DATABASE_REPLICA_NAME is set but the default cache is per process.",
+        hint="Set REDIS_URL so the replica stickiness of a user is shared by all workers.",
+        obj="CACHES",
+        id="api.E001",
+    )]
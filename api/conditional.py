@@ -0,0 +1,99 @@
+from functools import wraps
+
+from django.views.decorators.http import condition
+from django.utils import timezone
+
+from api.models import Collecte, Schedule, Subscription
+
+
+def conditional(version_func):
+    """ETag / Last-Modified for an @api_view GET, answered with 304 before the view runs.
+
+    ``version_func(request, *args, **kwargs)`` returns ``(key, last_modified)`` from a
+    cheap lookup (a few columns, no serializer), or None to always run the view (not
+    found, forbidden). ``key`` identifies the representation, ``last_modified`` is the
+    newest updated_at it depends on. Place it under @api_view so request.user is set.
+    """
+    def lookup(request, *args, **kwargs):
+        # etag_func and last_modified_func are both called: look up once per request
+        if not hasattr(request, "_conditional_version"):
+            request._conditional_version = version_func(request, *args, **kwargs)
+        return request._conditional_version
+
+    def etag(request, *args, **kwargs):
+        version = lookup(request, *args, **kwargs)
+        if version is None:
+            return None
+        key, last_modified = version
+        return f"{key}:{last_modified.timestamp():.6f}"
+
+    def last_modified(request, *args, **kwargs):
+        version = lookup(request, *args, **kwargs)
+        return version[1] if version else None
+
+    def decorator(view):
+        return wraps(view)(condition(etag_func=etag, last_modified_func=last_modified)(view))
+    return decorator
+
+
+def _newest(*values):
+    return max(v for v in values if v is not None)
+
+
+def current_user_version(request):
+    user = request.user
+    return f"user:{user.pk}", user.updated_at
+
+
+def schedule_version(request):
+    """Version of the schedule get_schedule would return (same ?subscription / ?user rules)."""
+    user = request.user
+    sub_id = request.GET.get("subscription")
+    user_id = request.GET.get("user") or request.GET.get("user_id")
+    if sub_id and user.role in ("SADMIN", "ADMIN", "BOUNCER"):
+        qs = Schedule.objects.filter(subscription_id=sub_id)
+    elif user_id and user.role in ("SADMIN", "ADMIN", "BOUNCER"):
+        qs = Schedule.objects.filter(subscription__client_id=user_id)
+    else:
+        qs = Schedule.objects.filter(subscription__client=user)
+    try:
+        row = qs.values_list("pk", "updated_at", "videur__updated_at").first()
+    except (TypeError, ValueError):
+        return None
+    if row is None:
+        return None
+    pk, updated_at, videur_updated_at = row
+    return f"schedule:{pk}", _newest(updated_at, videur_updated_at)
+
+
+def collecte_version(request, collecte_id):
+    """Version of the collecte and of the client / videur / subscription it embeds."""
+    row = Collecte.objects.filter(pk=collecte_id).values_list(
+        "client_id", "videur_id", "updated_at",
+        "client__updated_at", "videur__updated_at", "subscription__updated_at",
+    ).first()
+    if row is None:
+        return None
+    client_id, videur_id, *versions = row
+    user = request.user
+    if user.id not in (client_id, videur_id) and user.role not in ("SADMIN", "ADMIN"):
+        return None
+    return f"collecte:{collecte_id}", _newest(*versions)
+
+
+def subscription_version(request):
+    row = Subscription.objects.filter(client=request.user).values_list("pk", "updated_at").first()
+    if row is None:
+        return None
+    return f"subscription:{row[0]}", row[1]
+
+
+def subscription_status_version(request):
+    """check_subscription_status also changes when the subscription expires."""
+    row = Subscription.objects.filter(client=request.user).values_list("pk", "updated_at", "expires_at").first()
+    if row is None:
+        return None
+    pk, updated_at, expires_at = row
+    if expires_at and expires_at <= timezone.now():
+        updated_at = max(updated_at, expires_at)
+    return f"subscription-status:{pk}", updated_at
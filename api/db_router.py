@@ -0,0 +1,81 @@
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+# per-request routing state, set by api.middleware.ReplicaRoutingMiddleware
+_state = ContextVar("replica_state", default=None)
+
+
+class RequestState:
+    def __init__(self):
+        self.use_replica = False  # inside a @use_replica view
+        self.wrote = False  # this request wrote to the primary
+
+
+def replica_enabled():
+    return settings.REPLICA_DATABASE in settings.DATABASES
+
+
+def _sticky_key(user_id):
+    return f"replica:sticky:{user_id}"
+
+
+def mark_sticky(user_id):
+    """Read from the primary for REPLICA_STICKY_SECONDS after ``user_id`` wrote (read-your-writes)."""
+    cache.set(_sticky_key(user_id), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return cache.get(_sticky_key(user_id)) is not None
+
+
+class ReplicaRouter:
+    """Sends the reads of @use_replica views to REPLICA_DATABASE, everything else to default.
+
+    Without a replica configured, or outside such a view, it routes nothing and Django
+    uses `default`. A request falls back to the primary for its remaining reads once it writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state and state.use_replica and not state.wrote and replica_enabled():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # a replica of the same schema: `migrate --database replica` sets up a local copy
+        return True
+
+
+def use_replica(view):
+    """Run the reads of an @api_view on the replica (place it under @api_view).
+
+    Only for read-only views that tolerate replication lag; users who wrote in the last
+    REPLICA_STICKY_SECONDS keep reading from the primary.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        user = getattr(request, "user", None)
+        if state is None or not replica_enabled() or (user and user.is_authenticated and is_sticky(user.pk)):
+            return view(request, *args, **kwargs)
+        state.use_replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+    return wrapper
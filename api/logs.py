@@ -0,0 +1,147 @@
+"""Structured logging: JSON lines written by a background thread (settings.LOGGING).
+
+Records are put on a bounded queue by BackgroundHandler and written to stderr (LOG_STREAM)
+by a QueueListener thread, so logging never blocks a request on a slow stream / pipe; when
+the queue is full the record is dropped and counted. Each record carries the id of the
+request it was logged in (RequestIdMiddleware) and the debug / info / warning records of
+high-volume loggers can be sampled (LOG_SAMPLING).
+"""
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+request_id = ContextVar("request_id", default=None)
+
+# attributes of every LogRecord: anything else was passed in `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_SAFE_REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+
+
+def new_request_id(incoming=None):
+    """The caller's X-Request-ID when it looks like an id, else a new one."""
+    if incoming and _SAFE_REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds ``request_id`` to the record (run on the producer side: the context
+    variable is not visible from the listener thread)."""
+
+    def filter(self, record):
+        # django.request logs the response after the middleware returned: use its request
+        record.request_id = request_id.get() or getattr(getattr(record, "request", None), "id", None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a share of the records below ERROR of the loggers in LOG_SAMPLING
+    ({"django.request": 0.1}: the longest matching logger name wins). Kept records
+    carry ``sample_rate`` so counts can be scaled back."""
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1:
+            return True
+        record.sample_rate = rate
+        return random.random() < rate
+
+    @staticmethod
+    def rate(name):
+        rates = settings.LOG_SAMPLING
+        while name:
+            if name in rates:
+                return rates[name]
+            name = name.rpartition(".")[0]
+        return 1
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, request_id, exc and the
+    `extra` fields of the record."""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class BackgroundHandler(QueueHandler):
+    """QueueHandler feeding a QueueListener thread that writes to ``stream`` (default
+    stderr: command output on stdout stays parseable) with this handler's formatter. The
+    listener is (re)started in each process (gunicorn forks) and flushed at exit."""
+
+    def __init__(self, stream=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._listener = QueueListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # resolve the message, traceback and extras here: the record is written later, from another thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not isinstance(value, (str, int, float, bool, list, dict, type(None))):
+                setattr(record, key, str(value))
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
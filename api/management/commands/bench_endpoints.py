@@ -0,0 +1,79 @@
+import json
+import platform
+import subprocess
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from api.models import Collecte, Notification, Payment, Subscription, User
+from api.services.benchmark import run_benchmark
+from api.services.whatsapp_stub import make_stub_server
+from api.urls import urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every route of api/urls.py through the test client against the current database "
+        "(see generate_data) and print p50/p95 latency, query count and response size as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", default=None, help="Regex on the route, e.g. '^collecte'")
+        parser.add_argument("--output", default=None, help="Write the report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+
+        # WhatsApp calls (send-otp) go to an in-process Graph API stub
+        server = make_stub_server()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+
+        setup_test_environment()
+        try:
+            with override_settings(META_GRAPH_URL=f"http://{host}:{port}/v22.0", DEBUG=False):
+                results = run_benchmark(
+                    [str(p.pattern) for p in urlpatterns],
+                    repeat=options["repeat"], warmup=options["warmup"], only=options["only"],
+                )
+        except LookupError as e:
+            raise CommandError(str(e))
+        finally:
+            teardown_test_environment()
+            server.shutdown()
+            server.server_close()
+
+        report = {
+            "meta": {
+                "commit": commit,
+                "at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+                "rows": {
+                    model.__name__.lower(): model.objects.count()
+                    for model in (User, Subscription, Collecte, Payment, Notification)
+                },
+            },
+            "endpoints": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stderr.write(f"report written to {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,32 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.services.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = "Insert a synthetic dataset (users, subscriptions, schedules, collectes, payments, notifications)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--bouncers", type=int, default=20)
+        parser.add_argument("--years", type=float, default=2, help="Subscriptions started up to this many years ago")
+        parser.add_argument("--notifications", type=float, default=5, help="Average notifications per client")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--phone-prefix", default="+23765")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = generate(
+                clients=options["clients"], bouncers=options["bouncers"], years=options["years"],
+                notifications=options["notifications"], seed=options["seed"],
+                batch_size=options["batch_size"], phone_prefix=options["phone_prefix"],
+                log=lambda message: self.stderr.write(message),
+            )
+        counts["seconds"] = round(time.perf_counter() - started, 2)
+        self.stdout.write(json.dumps(counts))
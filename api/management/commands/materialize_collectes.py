@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.services.planning import materialize_collectes
+
+
+class Command(BaseCommand):
+    help = "Create the scheduled Collecte rows of every active Schedule slot for the next N days (idempotent)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=14)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = materialize_collectes(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{created} scheduled collectes created"))
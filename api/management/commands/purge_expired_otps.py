@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.otp_store import DBOTPStore
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows of the OTP table (database OTP store)."
+
+    def handle(self, *args, **options):
+        deleted = DBOTPStore().purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired OTP rows deleted"))
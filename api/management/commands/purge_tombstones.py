@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.changes import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete changes/ feed tombstones older than SYNC_TOMBSTONE_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tombstones deleted"))
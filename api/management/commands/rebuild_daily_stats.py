@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyStat rollups from Payment and Subscription (run once after deploying them)."
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"{count} daily stat rows rebuilt"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.geo import rebuild_geo_cells
+
+
+class Command(BaseCommand):
+    help = "Recompute Subscription.geo_cell (after deploying it or changing GEO_CELL_DEGREES)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = rebuild_geo_cells(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{changed} subscriptions updated"))
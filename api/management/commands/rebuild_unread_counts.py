@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.inbox import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the inbox unread counters (NotificationCounter) from the notifications."
+
+    def handle(self, *args, **options):
+        count = rebuild_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f"{count} unread counters rebuilt"))
@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.models import SlowQuery
+from api.serializers import SlowQuerySerializer
+from api.services.slow_queries import ORDERINGS, slow_queries
+
+
+class Command(BaseCommand):
+    help = "Print the slow-query log (statements slower than SLOW_QUERY_MS, by fingerprint) as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", choices=list(ORDERINGS), default="total")
+        parser.add_argument("--limit", type=int, default=50)
+        parser.add_argument("--reset", action="store_true", help="Empty the log after printing it")
+
+    def handle(self, *args, **options):
+        data = SlowQuerySerializer(slow_queries(options["order"], options["limit"]), many=True).data
+        self.stdout.write(json.dumps(data, indent=2, default=str))
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stderr.write(f"{deleted} fingerprints deleted")
@@ -0,0 +1,76 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.services.whatsapp import meta_post
+from api.services.whatsapp_stub import make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Measure WhatsApp send throughput, by default against an in-process Graph API stub."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--latency", type=float, default=0.0, help="Stub latency in seconds")
+        parser.add_argument("--url", default=None, help="Graph API base URL to hit instead of the in-process stub")
+        parser.add_argument("--no-pool", action="store_true", help="Use a bare requests.post per message (baseline)")
+
+    def handle(self, *args, **options):
+        server = None
+        url = options["url"]
+        if not url:
+            server = make_stub_server(latency=options["latency"])
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            host, port = server.server_address[:2]
+            url = f"http://{host}:{port}/v22.0"
+
+        payload = {"messaging_product": "whatsapp", "to": "237600000000", "type": "template",
+                   "template": {"name": "hello_world", "language": {"code": "en_US"}}}
+
+        def send_bare(_):
+            start = time.perf_counter()
+            resp = requests.post(
+                f"{url}/{settings.META_PHONE_ID}/messages", json=payload,
+                headers={"Authorization": f"Bearer {settings.META_WA_TOKEN}"},
+                timeout=(settings.META_HTTP_CONNECT_TIMEOUT, settings.META_HTTP_READ_TIMEOUT),
+            )
+            return time.perf_counter() - start, resp.status_code
+
+        def send_pooled(_):
+            start = time.perf_counter()
+            resp = meta_post(payload)
+            return time.perf_counter() - start, resp.status_code
+
+        send = send_bare if options["no_pool"] else send_pooled
+        try:
+            with override_settings(META_GRAPH_URL=url):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                    results = list(pool.map(send, range(options["count"])))
+                elapsed = time.perf_counter() - started
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+
+        latencies = sorted(r[0] for r in results)
+        errors = sum(1 for r in results if r[1] >= 400)
+        report = {
+            "client": "bare" if options["no_pool"] else "pooled",
+            "count": len(results),
+            "concurrency": options["concurrency"],
+            "errors": errors,
+            "seconds": round(elapsed, 3),
+            "per_second": round(len(results) / elapsed, 1) if elapsed else None,
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        }
+        self.stdout.write(json.dumps(report))
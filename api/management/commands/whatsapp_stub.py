@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.services.whatsapp_stub import make_stub_server
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the Meta Graph API messages endpoint (set META_GRAPH_URL to its URL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8787)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated server latency")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+
+    def handle(self, *args, **options):
+        server = make_stub_server(options["host"], options["port"], options["latency"], options["error_rate"])
+        host, port = server.server_address[:2]
+        self.stdout.write(f"Graph API stub listening on http://{host}:{port}/v22.0 (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,39 @@
+import os
+import socket
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.services.notify import deliver_pending_notifications
+
+
+class Command(BaseCommand):
+    help = "Deliver queued WhatsApp notifications from the Notification outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.WHATSAPP_OUTBOX_BATCH_SIZE)
+        parser.add_argument("--concurrency", type=int, default=settings.WHATSAPP_OUTBOX_CONCURRENCY)
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the outbox is empty")
+        parser.add_argument("--once", action="store_true", help="Drain the due rows then exit")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stdout.write(f"whatsapp worker {worker_id} started")
+        try:
+            while True:
+                sent, failed = deliver_pending_notifications(
+                    batch_size=options["batch_size"],
+                    concurrency=options["concurrency"],
+                    worker_id=worker_id,
+                )
+                if sent or failed:
+                    self.stdout.write(f"sent={sent} failed={failed}")
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("whatsapp worker stopped")
@@ -0,0 +1,52 @@
+"""Prometheus metrics of the API, served by api.views.metrics_views at /metrics.
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+shared by the workers (wiped at each deploy): every process writes its samples to
+mmap'ed files there and /metrics adds them up. Without it the registry is per process.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "dechets_http_request_duration_seconds", "Request latency by URL name.",
+    ["view", "method"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_ERRORS = Counter(
+    "dechets_http_request_errors_total", "Responses with a 4xx / 5xx status by URL name.",
+    ["view", "method", "status"],
+)
+WHATSAPP_SEND_LATENCY = Histogram(
+    "dechets_whatsapp_send_duration_seconds", "Meta Graph API message sends, retries included.",
+    buckets=LATENCY_BUCKETS,
+)
+WHATSAPP_SEND_FAILURES = Counter(
+    "dechets_whatsapp_send_failures_total", "Failed Meta Graph API sends (HTTP status or exception).",
+    ["reason"],
+)
+OTP_SENT = Counter("dechets_otp_sent_total", "OTP send requests by outcome.", ["outcome"])
+OTP_VERIFIED = Counter("dechets_otp_verified_total", "OTP verifications by outcome.", ["outcome"])
+AUTH_CACHE_LOOKUPS = Counter(
+    "dechets_auth_cache_lookups_total", "Authenticated user lookups (api.authentication) by cache level.",
+    ["result"],
+)
+
+
+def view_label(request):
+    """URL name of the matched route (namespaced, e.g. "admin:index"); unmatched paths share
+    one label so a scan of random URLs cannot create new series."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unmatched>"
+
+
+def render():
+    """(body, content type) of the metrics of this process, or of all workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,263 @@
+import cProfile
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from api.authentication import CachedJWTAuthentication
+from api.db_router import RequestState, _state, mark_sticky, replica_enabled
+from api.logs import new_request_id, request_id
+from api.metrics import REQUEST_ERRORS, REQUEST_LATENCY, view_label
+from api.services.profiling import SQLLog, SlowRequests, save_profile
+from api.services.slow_queries import SlowQueryRecorder, record
+
+logger = logging.getLogger(__name__)
+# cProfile hooks the whole process (Python 3.12+: enable() raises ValueError while another
+# profiler is active), so ProfilingMiddleware profiles one request at a time
+_profiler_lock = threading.Lock()
+
+
+
+class RequestIdMiddleware:
+    """Gives each request an id (the caller's X-Request-ID or a new one), attached to
+    every log record of the request (api.logs) and echoed in the X-Request-ID header."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.id = new_request_id(request.headers.get("X-Request-ID"))
+        token = request_id.set(request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response["X-Request-ID"] = request.id
+        return response
+
+class ReplicaRoutingMiddleware:
+    """Holds the per-request state of api.db_router.ReplicaRouter and makes an
+    authenticated user who wrote sticky to the primary for the next requests."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        # DRF sets the JWT user on the underlying request too
+        user = getattr(request, "user", None)
+        if state.wrote and replica_enabled() and user is not None and user.is_authenticated:
+            mark_sticky(user.pk)
+        return response
+
+
+class QueryStats:
+    """execute_wrapper counting the queries and database time of one request, with the
+    number of runs of each SQL statement (same text, any parameters)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        """(runs, sql) of the statements run at least ``threshold`` times: N+1 signatures."""
+        return [(n, sql) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+class QueryInstrumentationMiddleware:
+    """Counts the queries and database time of a sampled share of the requests
+    (SQL_INSTRUMENTATION_SAMPLE_RATE), adds them as a Server-Timing header and logs
+    the requests over their budget (SQL_BUDGETS, by URL name) or running the same
+    statement SQL_N_PLUS_ONE_THRESHOLD times or more."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = stats.duration * 1000
+
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms - db_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+        self.check_budget(request, response, stats, total_ms, db_ms)
+        return response
+
+    def check_budget(self, request, response, stats, total_ms, db_ms):
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match else None
+        budget = {**settings.SQL_BUDGETS.get("default", {}), **settings.SQL_BUDGETS.get(url_name, {})}
+        over = []
+        if "queries" in budget and stats.count > budget["queries"]:
+            over.append(f"{stats.count} queries > {budget['queries']}")
+        if "ms" in budget and total_ms > budget["ms"]:
+            over.append(f"{total_ms:.0f} ms > {budget['ms']}")
+        repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+        if not over and not repeated:
+            return
+        logger.warning(
+            "%s %s (%s) -> %s: %s queries, %.1f ms in db, %.1f ms total%s%s",
+            request.method, request.path, url_name, response.status_code, stats.count, db_ms, total_ms,
+            "; over budget: " + ", ".join(over) if over else "",
+            "".join(f"\n  repeated {n}x: {sql}" for n, sql in repeated[:5]),
+            extra={
+                "url_name": url_name,
+                "status": response.status_code,
+                "queries": stats.count,
+                "db_ms": round(db_ms, 1),
+                "total_ms": round(total_ms, 1),
+                "repeated": [{"count": n, "sql": sql} for n, sql in repeated],
+            },
+        )
+
+
+class MetricsMiddleware:
+    """Observes the latency of every request and counts the 4xx / 5xx responses,
+    labelled by URL name (api.metrics)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view=view, method=request.method).observe(time.perf_counter() - start)
+        if response.status_code >= 400:
+            REQUEST_ERRORS.labels(view=view, method=request.method, status=str(response.status_code)).inc()
+        return response
+
+
+class ProfilingMiddleware:
+    """Runs a request under cProfile and stores the pstats dump with the SQL log
+    (api.services.profiling, listed at /api/profiles/).
+
+    A SADMIN asks for it with an ``X-Profile: 1`` header or ``?profile=1``; the
+    response then carries ``X-Profile-Id``. With PROFILE_SAMPLE_RATE > 0 that share
+    of the other requests is profiled too, and kept when it is among the slowest
+    (PROFILE_SLOW_QUANTILE) of the recent requests of the process.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow = SlowRequests(settings.PROFILE_SLOW_QUANTILE)
+
+    def requested_by_superadmin(self, request):
+        if request.headers.get("X-Profile") != "1" and request.GET.get("profile") != "1":
+            return False
+        # the view authenticates the JWT later: check it now (a cache hit) to profile SADMINs only
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return authenticated is not None and authenticated[0].role == "SADMIN"
+
+    def unprofiled(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.slow.record((time.perf_counter() - start) * 1000)
+        return response
+
+    def __call__(self, request):
+        requested = self.requested_by_superadmin(request)
+        rate = settings.PROFILE_SAMPLE_RATE
+        if not requested and not (rate > 0 and random.random() < rate):
+            return self.unprofiled(request)
+        # one profiler per process: a request arriving while another thread profiles runs unprofiled
+        if not _profiler_lock.acquire(blocking=False):
+            if requested:
+                logger.warning("Profile skipped: another request is being profiled")
+            return self.unprofiled(request)
+        try:
+            return self.profiled(request, requested)
+        finally:
+            _profiler_lock.release()
+
+    def profiled(self, request, requested):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:  # another profiler of the process (cProfile, a debugger) is active
+            logger.warning("Profile skipped: %s", e)
+            return self.unprofiled(request)
+        sql = SQLLog()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(sql))
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        ms = (time.perf_counter() - start) * 1000
+        # profiled durations are inflated by cProfile: they do not move the threshold
+        if requested or self.slow.is_slow(ms):
+            profile_id = save_profile(profiler, {
+                "at": timezone.now(),
+                "trigger": "request" if requested else "slow",
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": view_label(request),
+                "status": response.status_code,
+                "ms": round(ms, 1),
+                "queries": sql.queries,
+            })
+            if requested:
+                response["X-Profile-Id"] = profile_id
+        return response
+
+
+class SlowQueryMiddleware:
+    """Collects the statements slower than SLOW_QUERY_MS and, once the response is
+    built, adds them to the slow-query log (api.services.slow_queries) with the URL
+    name of the view that ran them. SLOW_QUERY_MS = 0 turns it off."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_MS <= 0:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(settings.SLOW_QUERY_MS)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        if recorder.slow:
+            try:
+                record(view_label(request), recorder.slow)
+            except DatabaseError:
+                logger.exception("could not record %s slow queries of %s", len(recorder.slow), request.path)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['subscription', '-created_at', '-id'], name='payment_sub_created_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-17 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_payment_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField()),
+                ('minutes', models.PositiveSmallIntegerField()),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_rows', to='api.schedule')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'minutes', 'schedule'], name='scheduleslot_day_minutes_idx')],
+            },
+        ),
+    ]
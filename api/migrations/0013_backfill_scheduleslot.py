@@ -0,0 +1,47 @@
+from django.db import migrations
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def slot_key(slot):
+    # frozen copy of ScheduleSlot.key()
+    if not isinstance(slot, dict):
+        return None
+    day = slot.get("day")
+    if isinstance(day, int) or (isinstance(day, str) and day.strip().isdigit()):
+        day = int(day)
+    elif isinstance(day, str):
+        candidate = day.strip().lower()
+        day = next((i for i, name in enumerate(WEEKDAYS, start=1) if candidate in (name, name[:3])), None)
+    if not isinstance(day, int) or not 1 <= day <= 7:
+        return None
+    try:
+        hours, mins = (int(part) for part in str(slot.get("time")).strip().split(":"))
+    except (TypeError, ValueError):
+        return None
+    if not (0 <= hours <= 23 and 0 <= mins <= 59):
+        return None
+    return day, hours * 60 + mins
+
+
+def backfill_slots(apps, schema_editor):
+    Schedule = apps.get_model('api', 'Schedule')
+    ScheduleSlot = apps.get_model('api', 'ScheduleSlot')
+    rows = []
+    for schedule in Schedule.objects.only('id', 'slots').iterator():
+        for slot in schedule.slots or []:
+            key = slot_key(slot)
+            if key:
+                rows.append(ScheduleSlot(schedule_id=schedule.id, day=key[0], minutes=key[1]))
+    ScheduleSlot.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_scheduleslot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-17 00:21
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_payment_city(apps, schema_editor):
+    Payment = apps.get_model('api', 'Payment')
+    Subscription = apps.get_model('api', 'Subscription')
+    Payment.objects.filter(subscription__isnull=False).update(
+        city=Subquery(Subscription.objects.filter(pk=OuterRef('subscription_id')).values('city')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_backfill_scheduleslot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='city',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_payment_city, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('plan', models.CharField(max_length=30)),
+                ('currency', models.CharField(max_length=10)),
+                ('city', models.CharField(blank=True, default='', max_length=255)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments_count', models.IntegerField(default=0)),
+                ('subscriptions_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'plan', 'currency', 'city'), name='dailystat_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 00:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('eng_title', models.TextField(blank=True, default='')),
+                ('eng_message', models.TextField(blank=True, default='')),
+                ('type', models.CharField(choices=[('OTP', 'Code OTP'), ('ACCOUNT_APPROVED', 'Compte activé'), ('INFO', 'Information'), ('WARNING', 'Avertissement'), ('ERROR', 'Erreur'), ('SUCCESS', 'Success')], default='INFO', max_length=20)),
+                ('channels', models.JSONField(default=list)),
+                ('filters', models.JSONField(blank=True, default=dict)),
+                ('template_name', models.CharField(blank=True, default='', max_length=100)),
+                ('template_params', models.JSONField(blank=True, default=list)),
+                ('target_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='api.broadcast'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_broadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='geo_cell',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
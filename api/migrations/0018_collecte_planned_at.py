@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_subscription_geo_cell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collecte',
+            name='planned_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='collecte',
+            constraint=models.UniqueConstraint(fields=('subscription', 'planned_at'), name='collecte_unique_planned_slot'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_collecte_planned_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collecte',
+            name='sync_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
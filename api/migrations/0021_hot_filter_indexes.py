@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_changes_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collecte',
+            index=models.Index(fields=['client', 'date'], name='collecte_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collecte',
+            index=models.Index(fields=['videur', 'status', 'date'], name='collecte_videur_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at', '-id'], name='notification_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['client', '-created_at', '-id'], name='payment_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'paid_at'], name='payment_status_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['city'], name='subscription_city_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 01:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_city_idx',
+        ),
+    ]
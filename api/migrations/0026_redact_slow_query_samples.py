@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 01:20
+
+from django.db import migrations
+from django.db.models import F
+
+
+def redact(apps, schema_editor):
+    # samples and PostgreSQL plans recorded so far carry the bind parameter values
+    SlowQuery = apps.get_model('api', 'SlowQuery')
+    SlowQuery.objects.update(sample=F('sql'), explain='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_drop_subscription_city_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery, Sum
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin,Group, Permission
 from django.utils import timezone
 from django.utils.text import slugify
+import math
 import uuid
 from django.conf import settings
 
@@ -85,7 +87,6 @@ class OTP(models.Model):
 
     def is_expired(self):
         expiration = settings.OTP_EXPIRATION_SECONDS
-        print("last_sent_at:", settings.OTP_EXPIRATION_SECONDS)
         return (timezone.now() - self.last_sent_at).total_seconds() > expiration
 
     def can_resend(self):
@@ -121,9 +122,43 @@ class Notification(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True)
     meta = models.JSONField(default=dict, blank=True)  # store payload / gateway response
 
+    # Outbox: WhatsApp notifications are queued here and delivered by `manage.py whatsapp_worker`
+    DELIVERY_CHOICES = [
+        ("", "Not queued"),
+        ("pending", "En attente"),
+        ("sending", "En cours d'envoi"),
+        ("sent", "Envoyé"),
+        ("failed", "Échoué"),
+    ]
+    delivery_status = models.CharField(max_length=20, choices=DELIVERY_CHOICES, default="", blank=True)
+    template_name = models.CharField(max_length=100, blank=True, default="")
+    template_params = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)  # retry time, or lease end while sending
+    claimed_by = models.CharField(max_length=64, blank=True, default="")
+    broadcast = models.ForeignKey("Broadcast", on_delete=models.SET_NULL, null=True, blank=True, related_name="notifications")
+    updated_at = models.DateTimeField(auto_now=True)  # changes/ feed watermark
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["delivery_status", "next_attempt_at"], name="notification_outbox_idx"),
+            models.Index(fields=["user", "updated_at"], name="notification_user_updated_idx"),
+            # unread / read notifications of a user, newest first
+            models.Index(fields=["user", "is_read", "-created_at", "-id"], name="notification_user_read_idx"),
+            # the inbox (api/services/inbox.py): in-app notifications of a user, newest first
+            models.Index(fields=["user", "channel", "-created_at", "-id"], name="notification_inbox_idx"),
+            # its unread filter: is_read=False compiles to NOT is_read, which a key column cannot seek on
+            models.Index(
+                fields=["user", "channel", "-created_at", "-id"], condition=models.Q(is_read=False),
+                name="notification_inbox_unread_idx",
+            ),
+        ]
+
     def mark_sent(self, response_meta=None):
         self.sent = True
         self.sent_at = timezone.now()
+        if self.delivery_status:
+            self.delivery_status = "sent"
         if response_meta:
             self.meta = response_meta
         self.save()
@@ -133,6 +168,45 @@ class Notification(models.Model):
         phone = getattr(self.user, "phone_number", str(self.user.pk))
         return f"{phone} • {self.title}"
 
+
+class NotificationCounter(models.Model):
+    """Unread IN_APP notifications of a user, read by the inbox badge instead of a COUNT(*).
+
+    Kept up to date by api.services.inbox (create, bulk create, mark-read, delete);
+    a user without a row has none.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+class SubscriptionQuerySet(models.QuerySet):
+    def with_payment_history(self, limit=None):
+        """Prefetch the latest ``limit`` payments of every subscription in one
+        windowed query (to_attr ``recent_payments``) and annotate the payment
+        aggregates read by SubscriptionSerializer.
+
+        Aggregates are correlated subqueries so they are only evaluated for the
+        rows of the current page.
+        """
+        if limit is None:
+            limit = settings.SUBSCRIPTION_PAYMENTS_LIMIT
+        payments = Payment.objects.filter(subscription=OuterRef("pk")).order_by().values("subscription")
+        succeeded = payments.filter(status="success")
+        return self.prefetch_related(
+            Prefetch(
+                "payments",
+                queryset=Payment.objects.order_by("-created_at", "-id")[:limit],
+                to_attr="recent_payments",
+            )
+        ).annotate(
+            payments_count=Subquery(payments.annotate(c=Count("id")).values("c")),
+            total_paid=Subquery(succeeded.annotate(s=Sum("amount")).values("s")),
+            last_paid_at=Subquery(succeeded.annotate(m=Max("paid_at")).values("m")),
+        )
+
+
 class Subscription(models.Model):
     PLAN_CHOICES = [
         ("FREE", "Gratuit"),
@@ -153,6 +227,8 @@ class Subscription(models.Model):
     collection_frequency = models.IntegerField(default=1)  # collectes par semaine
     longitude = models.FloatField(default=0)
     latitude = models.FloatField(default=0)
+    # grid cell of (latitude, longitude) for proximity lookups (api/services/geo.py)
+    geo_cell = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
     address = models.CharField(max_length=255,default="")
     city = models.CharField(max_length=255,default="")
     # Paiement
@@ -160,24 +236,59 @@ class Subscription(models.Model):
     gateway_subscription_id = models.CharField(max_length=200, blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     currency = models.CharField(max_length=10, default='XAF')
+    updated_at = models.DateTimeField(auto_now=True)  # changes/ feed watermark
+
+    # collectes per week of each plan
+    PLAN_FREQUENCY = {
+        "FREE": 1,
+        "STARTER": 1,
+        "PRO": 2,
+        "PREMIUM": 7,
+    }
+
+    objects = SubscriptionQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
-        PLAN_FREQUENCY = {
-            "FREE": 1,
-            "STARTER": 1,
-            "PRO": 2,
-            "PREMIUM": 7,
-        }
         if not self.collection_frequency:
-            self.collection_frequency = PLAN_FREQUENCY.get(self.plan, 1)
+            self.collection_frequency = self.PLAN_FREQUENCY.get(self.plan, 1)
+        self.geo_cell = self.compute_geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geo_cell"}
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def compute_geo_cell(latitude, longitude):
+        """Row-major index of the GEO_CELL_DEGREES grid cell holding the point.
+
+        (0, 0) is the unset default of the coordinates, so it gets no cell.
+        """
+        if latitude is None or longitude is None or (not latitude and not longitude):
+            return None
+        size = settings.GEO_CELL_DEGREES
+        columns = math.ceil(360 / size)
+        row = math.floor((min(max(latitude, -90.0), 90.0) + 90) / size)
+        col = math.floor(((longitude + 180) % 360) / size)
+        return row * columns + col
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # keep the loaded values so api.signals can diff the DailyStat contribution
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return f"{self.client.phone_number} - {self.plan}"
 
     class Meta:
         verbose_name = "Abonnement"
         verbose_name_plural = "Abonnements"
+        indexes = [
+            # keyset pagination of list_subscriptions
+            models.Index(fields=["-started_at", "-id"], name="subscription_started_id_idx"),
+            models.Index(fields=["updated_at"], name="subscription_updated_idx"),
+        ]
 
 # -------------------------
 # Collecte / Tournee
@@ -205,6 +316,25 @@ class Collecte(models.Model):
     waste_type = models.CharField(max_length=50, choices=WASTE_CHOICES, default='mixed')
     weight_kg = models.FloatField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
+    # slot datetime for rows materialized from Schedule slots (manage.py materialize_collectes)
+    planned_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # id generated by an offline bouncer device (collectes/sync/), makes re-sent creates idempotent
+    sync_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)  # changes/ feed watermark
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["subscription", "planned_at"], name="collecte_unique_planned_slot"),
+        ]
+        indexes = [
+            # changes/ feed, per role
+            models.Index(fields=["client", "updated_at"], name="collecte_client_updated_idx"),
+            models.Index(fields=["videur", "updated_at"], name="collecte_videur_updated_idx"),
+            models.Index(fields=["updated_at"], name="collecte_updated_idx"),
+            # list_collectes filters
+            models.Index(fields=["client", "date"], name="collecte_client_date_idx"),
+            models.Index(fields=["videur", "status", "date"], name="collecte_videur_status_idx"),
+        ]
 
 
     def __str__(self):
@@ -234,6 +364,8 @@ class Payment(models.Model):
 
     # Snapshot of the plan at time of payment (useful in history)
     plan = models.CharField(max_length=30, choices=Subscription.PLAN_CHOICES, default="FREE")
+    # Snapshot of the subscription city at time of payment (DailyStat rollups)
+    city = models.CharField(max_length=255, blank=True, default="")
 
     # Infos paiement
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -245,6 +377,29 @@ class Payment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of list_payments
+            models.Index(fields=["-created_at", "-id"], name="payment_created_id_idx"),
+            # latest-N payment history per subscription
+            models.Index(fields=["subscription", "-created_at", "-id"], name="payment_sub_created_idx"),
+            # list_payments ?client= / ?status=
+            models.Index(fields=["client", "-created_at", "-id"], name="payment_client_created_idx"),
+            models.Index(fields=["status", "paid_at"], name="payment_status_paid_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # keep the loaded values so api.signals can diff the DailyStat contribution
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.city and self.subscription_id:
+            self.city = self.subscription.city
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.client.phone_number} - {self.amount} {self.currency} - {self.status}"
 
@@ -264,6 +419,172 @@ class Schedule(models.Model):
     # exemple : [("Lundi", "12:00"), ("Jeudi", "13:50")]
     # on peut stocker ça sous forme JSON
     slots = models.JSONField(default=list, help_text="Liste de jours et heures, ex: [{'day':'Monday','time':'12:00'}]")
+    updated_at = models.DateTimeField(auto_now=True)  # changes/ feed watermark
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["videur", "updated_at"], name="schedule_videur_updated_idx"),
+            models.Index(fields=["updated_at"], name="schedule_updated_idx"),
+        ]
+
+    def sync_slot_rows(self):
+        """Rewrite the ScheduleSlot rows from ``slots`` (called by ScheduleSerializer, in the
+        transaction that saves the schedule)."""
+        self.slot_rows.all().delete()
+        rows = []
+        for slot in self.slots or []:
+            key = ScheduleSlot.key(slot)
+            if key:
+                rows.append(ScheduleSlot(schedule=self, day=key[0], minutes=key[1]))
+        ScheduleSlot.objects.bulk_create(rows)
+
+    def __str__(self):
+        return f"{self.subscription.client.phone_number} - {self.videur.phone_number if self.videur else 'Non assigné'}"
+
+
+class ScheduleSlot(models.Model):
+    """One row per entry of Schedule.slots so day/time filters run in SQL.
+
+    ``day`` is 1..7 (1=Monday) and ``minutes`` the time as minutes since midnight.
+    """
+    WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="slot_rows")
+    day = models.PositiveSmallIntegerField()
+    minutes = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "minutes", "schedule"], name="scheduleslot_day_minutes_idx"),
+        ]
+
+    @classmethod
+    def day_number(cls, value):
+        """1..7 from an int, digit string or (abbreviated) English weekday name, else None."""
+        if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+            day = int(value)
+            return day if 1 <= day <= 7 else None
+        if isinstance(value, str):
+            candidate = value.strip().lower()
+            for i, name in enumerate(cls.WEEKDAYS, start=1):
+                if candidate == name.lower() or candidate == name[:3].lower():
+                    return i
+        return None
+
+    @staticmethod
+    def parse_minutes(value):
+        """Minutes since midnight from 'HH:MM', else None."""
+        try:
+            hours, mins = str(value).strip().split(":")
+            hours, mins = int(hours), int(mins)
+        except (TypeError, ValueError):
+            return None
+        if 0 <= hours <= 23 and 0 <= mins <= 59:
+            return hours * 60 + mins
+        return None
+
+    @classmethod
+    def key(cls, slot):
+        """(day, minutes) of a slot dict, or None if it is malformed."""
+        if not isinstance(slot, dict):
+            return None
+        day = cls.day_number(slot.get("day"))
+        minutes = cls.parse_minutes(slot.get("time"))
+        if day is None or minutes is None:
+            return None
+        return day, minutes
+
+    def __str__(self):
+        return f"{self.WEEKDAYS[self.day - 1]} {self.minutes // 60:02d}:{self.minutes % 60:02d}"
+
+
+class DailyStat(models.Model):
+    """Daily rollup read by stats_revenues / stats_subscriptions.
+
+    Kept up to date by api.signals when payments succeed and subscriptions are
+    created, changed or deleted; rebuilt with ``manage.py rebuild_daily_stats``.
+    """
+    date = models.DateField()
+    plan = models.CharField(max_length=30)
+    currency = models.CharField(max_length=10)
+    city = models.CharField(max_length=255, blank=True, default="")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # successful payments
+    payments_count = models.IntegerField(default=0)
+    subscriptions_count = models.IntegerField(default=0)  # subscriptions started that day
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "plan", "currency", "city"], name="dailystat_unique_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.plan} {self.currency} {self.city}"
+
+
+class Broadcast(models.Model):
+    """An admin announcement fanned out as one Notification per target user and channel."""
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="broadcasts")
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    eng_title = models.TextField(default="", blank=True)
+    eng_message = models.TextField(default="", blank=True)
+    type = models.CharField(max_length=20, choices=Notification.NOTIF_TYPES, default="INFO")
+    channels = models.JSONField(default=list)  # e.g. ["IN_APP", "WHATSAPP"]
+    filters = models.JSONField(default=dict, blank=True)  # {"city": ..., "plan": ..., "videur": ...}
+    template_name = models.CharField(max_length=100, blank=True, default="")
+    template_params = models.JSONField(default=list, blank=True)
+    target_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)  # all Notification rows written
+
+    def __str__(self):
+        return f"{self.title} ({self.target_count})"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row served by the changes/ feed so clients can drop it; also
+    written when a row is reassigned, for the user it was taken from.
+
+    ``owner_id`` / ``videur_id`` are the user ids the row was visible to (plain
+    integers: the users themselves may be gone). Written by api.signals.
+    """
+    MODEL_CHOICES = [
+        ("collecte", "Collecte"),
+        ("schedule", "Schedule"),
+        ("subscription", "Subscription"),
+        ("notification", "Notification"),
+    ]
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    videur_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_id", "deleted_at"], name="tombstone_owner_idx"),
+            models.Index(fields=["videur_id", "deleted_at"], name="tombstone_videur_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
+
+
+class SlowQuery(models.Model):
+    """Statements slower than SLOW_QUERY_MS, aggregated by fingerprint (the SQL with its
+    literals and IN lists normalized). Written by api.services.slow_queries."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField()  # normalized statement
+    sample = models.TextField()  # slowest occurrence, with the types (not values) of its parameters
+    view = models.CharField(max_length=100, blank=True, default="")  # URL name of the last caller
+    explain = models.TextField(blank=True, default="")  # plan of the slowest occurrence
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
 
     def __str__(self):
-        return f"{self.subscription.client.phone_number} - {self.videur.phone_number if self.videur else 'Non assigné'}"
\ No newline at end of file
+        return f"{self.fingerprint} x{self.count}"
@@ -0,0 +1,25 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor (keyset) pagination for the @api_view list endpoints.
+
+    Pages are read with a WHERE on the first ordering field instead of an
+    OFFSET, so page N costs the same as page 1, and no COUNT(*) is issued.
+    The ordering must be backed by an index (see the Meta.indexes of the models).
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+
+
+def paginate(request, queryset, serializer_class, ordering="-id", **serializer_kwargs):
+    """Paginate ``queryset`` and return the DRF response {next, previous, results}."""
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, **serializer_kwargs)
+    return paginator.get_paginated_response(serializer.data)
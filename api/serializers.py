@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 from rest_framework import serializers
-from api.models import Subscription, User, Payment, Schedule, Collecte
+from api.models import Subscription, User, Payment, Schedule, Collecte, Broadcast, Notification, SlowQuery
+from api.services.broadcast import BROADCAST_CHANNELS, BROADCAST_FILTERS
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,17 +33,53 @@ class UserMeSerializer(serializers.ModelSerializer):
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
+    """Embeds only the latest SUBSCRIPTION_PAYMENTS_LIMIT payments plus aggregates.
+
+    Use Subscription.objects.with_payment_history() for lists so the history and
+    aggregates come from the page query; otherwise they are fetched per object.
+    """
     payments = serializers.SerializerMethodField()
+    payments_count = serializers.SerializerMethodField()
+    total_paid = serializers.SerializerMethodField()
+    last_paid_at = serializers.SerializerMethodField()
 
     def get_payments(self, obj):
-        payments_qs = getattr(obj, "payments", Payment.objects.none()).all()
+        payments_qs = getattr(obj, "recent_payments", None)
+        if payments_qs is None:
+            if not obj.pk:
+                return []
+            payments_qs = obj.payments.order_by("-created_at", "-id")[:settings.SUBSCRIPTION_PAYMENTS_LIMIT]
         return PaymentSerializer(payments_qs, many=True).data
 
+    def _payment_stats(self, obj):
+        if not hasattr(obj, "payments_count"):
+            stats = {"payments_count": 0, "total_paid": None, "last_paid_at": None}
+            if obj.pk:
+                stats = obj.payments.aggregate(
+                    payments_count=Count("id"),
+                    total_paid=Sum("amount", filter=Q(status="success")),
+                    last_paid_at=Max("paid_at", filter=Q(status="success")),
+                )
+            for key, value in stats.items():
+                setattr(obj, key, value)
+        return obj
+
+    def get_payments_count(self, obj):
+        return self._payment_stats(obj).payments_count or 0
+
+    def get_total_paid(self, obj):
+        return str(self._payment_stats(obj).total_paid or 0)
+
+    def get_last_paid_at(self, obj):
+        value = self._payment_stats(obj).last_paid_at
+        return serializers.DateTimeField().to_representation(value) if value else None
+
     class Meta:
         model = Subscription
         fields = [
             "id", "plan", "started_at", "expires_at","latitude","longitude","address","city","price",
-            "is_active", "gateway", "gateway_subscription_id", "payments"
+            "is_active", "gateway", "gateway_subscription_id", "payments",
+            "payments_count", "total_paid", "last_paid_at"
         ]
 
 
@@ -133,6 +173,21 @@ class ScheduleSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    # the schedule and its ScheduleSlot rows are written together: a failed sync must not
+    # leave slots the day / time filters of list_schedules no longer match
+    @transaction.atomic
+    def create(self, validated_data):
+        schedule = super().create(validated_data)
+        schedule.sync_slot_rows()
+        return schedule
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        schedule = super().update(instance, validated_data)
+        if 'slots' in validated_data:
+            schedule.sync_slot_rows()
+        return schedule
+
 
 class CollecteSerializer(serializers.ModelSerializer):
     client = UserMeSerializer(read_only=True)
@@ -148,4 +203,111 @@ class CollecteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Collecte
         fields = ["id", "client", "videur", "subscription", "subscription_id", "date", "status", "waste_type", "weight_kg", "created_at"]
-        read_only_fields = ["created_at"]
\ No newline at end of file
+        read_only_fields = ["created_at"]
+
+
+class UserBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "name", "phone_number"]
+
+
+class SubscriptionBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Subscription
+        fields = ["id", "plan", "address", "latitude", "longitude"]
+
+
+class CollecteListSerializer(serializers.ModelSerializer):
+    """Flat, read-only representation used by list_collectes.
+
+    Only reads columns of the select_related query (see LIST_FIELDS), so a page
+    costs a single query whatever its size. get_collecte keeps CollecteSerializer.
+    """
+    client = UserBriefSerializer(read_only=True)
+    videur = UserBriefSerializer(read_only=True)
+    subscription = SubscriptionBriefSerializer(read_only=True)
+
+    # columns to pass to QuerySet.only() alongside select_related('client', 'videur', 'subscription')
+    LIST_FIELDS = [
+        "id", "date", "status", "waste_type", "weight_kg", "created_at",
+        "client__id", "client__name", "client__phone_number",
+        "videur__id", "videur__name", "videur__phone_number",
+        "subscription__id", "subscription__plan", "subscription__address",
+        "subscription__latitude", "subscription__longitude",
+    ]
+
+    class Meta:
+        model = Collecte
+        fields = ["id", "client", "videur", "subscription", "date", "status", "waste_type", "weight_kg", "created_at"]
+        read_only_fields = fields
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ["id", "title", "message", "eng_title", "eng_message", "type", "channel", "is_read", "created_at"]
+        read_only_fields = fields
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Broadcast
+        fields = [
+            "id", "title", "message", "eng_title", "eng_message", "type", "channels", "filters",
+            "template_name", "template_params", "target_count", "created_at", "completed_at"
+        ]
+        read_only_fields = ["target_count", "created_at", "completed_at"]
+
+    def validate_channels(self, value):
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError("Channels must be a non-empty list")
+        invalid = [c for c in value if c not in BROADCAST_CHANNELS]
+        if invalid:
+            raise serializers.ValidationError(f"Unsupported channels: {invalid}. Use {list(BROADCAST_CHANNELS)}")
+        return list(dict.fromkeys(value))
+
+    def validate_filters(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Filters must be an object")
+        unknown = [k for k in value if k not in BROADCAST_FILTERS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filters: {unknown}. Use {list(BROADCAST_FILTERS)}")
+        return value
+
+
+class CollecteSyncItemSerializer(serializers.Serializer):
+    """One create/update operation of collectes/sync/ (validation only, no queries)."""
+    op = serializers.ChoiceField(choices=["create", "update"])
+    sync_id = serializers.UUIDField(required=False)
+    id = serializers.IntegerField(required=False)
+    client = serializers.IntegerField(required=False)
+    date = serializers.DateTimeField(required=False)
+    status = serializers.ChoiceField(choices=Collecte.STATUS_CHOICES, required=False)
+    waste_type = serializers.ChoiceField(choices=Collecte.WASTE_CHOICES, required=False)
+    weight_kg = serializers.FloatField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        if attrs["op"] == "create":
+            if not attrs.get("sync_id"):
+                raise serializers.ValidationError({"sync_id": ["This field is required for create"]})
+            if not attrs.get("client"):
+                raise serializers.ValidationError({"client": ["This field is required for create"]})
+        elif not attrs.get("id") and not attrs.get("sync_id"):
+            raise serializers.ValidationError({"id": ["Provide id or sync_id for update"]})
+        return attrs
+
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    avg_ms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SlowQuery
+        fields = [
+            "fingerprint", "sql", "sample", "view", "explain", "count",
+            "total_ms", "avg_ms", "max_ms", "first_seen", "last_seen",
+        ]
+        read_only_fields = fields
+
+    def get_avg_ms(self, obj):
+        return round(obj.total_ms / obj.count, 3) if obj.count else None
@@ -0,0 +1,190 @@
+# api/services/benchmark.py
+import re
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Broadcast, Collecte, ScheduleSlot, Subscription, User
+
+
+class Fixtures:
+    """Rows of the (generated) database the benchmark requests point at."""
+
+    def __init__(self):
+        self.admin = User.objects.filter(role__in=("ADMIN", "SADMIN")).order_by("id").first()
+        self.bouncer = (
+            User.objects.filter(role="BOUNCER", assigned_schedules__isnull=False).order_by("id").first()
+        )
+        self.client = (
+            User.objects.filter(role="USER", subscription__schedule__isnull=False, collectes_client__isnull=False)
+            .order_by("id").first()
+        )
+        if not (self.admin and self.bouncer and self.client):
+            raise LookupError("no admin, bouncer and client with a schedule: run `manage.py generate_data` first")
+        self.subscription = self.client.subscription
+        self.collecte = Collecte.objects.filter(client=self.client).order_by("-id").first()
+        self.unscheduled = Subscription.objects.filter(schedule__isnull=True).order_by("id").first()
+        self.broadcast = Broadcast.objects.order_by("-id").first()
+
+    def user(self, role):
+        return {"admin": self.admin, "bouncer": self.bouncer, "client": self.client}.get(role)
+
+
+def _slots(sub):
+    """Slots matching the collection frequency of ``sub`` (checked by ScheduleSerializer)."""
+    return [{"day": day, "time": "08:00"} for day in ScheduleSlot.WEEKDAYS[:sub.collection_frequency]]
+
+
+# route (as written in api/urls.py) -> how to call it: method, user role, data, URL kwargs.
+# Unsafe methods run in a rolled-back transaction, so the database is left unchanged.
+ROUTES = {
+    "auth/send-otp/": {"method": "POST", "user": None, "data": lambda f: {"phone": f.client.phone_number}},
+    "auth/verify-otp/": {"method": "POST", "user": None, "data": lambda f: {"phone": f.client.phone_number, "code": "000000"}},
+    "user/me/update/": {"method": "PATCH", "user": "client", "data": lambda f: {"name": f.client.name}},
+    "user/me/delete/": {"method": "DELETE", "user": "client"},
+    "user/me/": {"method": "GET", "user": "client"},
+    "subscription/": {"method": "GET", "user": "client"},
+    "subscription/update/": {"method": "PATCH", "user": "client", "data": lambda f: {"address": f.subscription.address}},
+    "subscription/delete/": {"method": "DELETE", "user": "client"},
+    "subscription/status/": {"method": "GET", "user": "client"},
+    "subscription/change-plan/": {"method": "POST", "user": "client", "data": lambda f: {"plan": "PRO"}},
+    "subscription/toggle/": {"method": "POST", "user": "client"},
+    "subscription/renew/": {"method": "POST", "user": "client", "data": lambda f: {"months": 1}},
+    "subscription/payments/": {"method": "GET", "user": "client"},
+    "schedule/": {"method": "GET", "user": "client"},
+    # create_schedule currently answers 403 to admins and bouncers
+    "schedule/create/": {
+        "method": "POST", "user": "client",
+        "data": lambda f: {"subscription": f.unscheduled.id if f.unscheduled else f.subscription.id, "slots": _slots(f.unscheduled or f.subscription)},
+    },
+    "schedule/update/": {"method": "PATCH", "user": "admin", "data": lambda f: {"subscription": f.subscription.id, "slots": _slots(f.subscription)}},
+    "schedule/delete/": {"method": "DELETE", "user": "admin", "query": lambda f: {"subscription": f.subscription.id}},
+    "schedules/": {"method": "GET", "user": "admin"},
+    "collecte/create/": {"method": "POST", "user": "bouncer", "data": lambda f: {"client": f.client.id, "weight_kg": 3}},
+    "collecte/<int:collecte_id>/": {"method": "GET", "user": "client", "kwargs": lambda f: {"collecte_id": f.collecte.id}},
+    "collecte/<int:collecte_id>/update/": {
+        "method": "PATCH", "user": "admin", "data": lambda f: {"status": "completed"},
+        "kwargs": lambda f: {"collecte_id": f.collecte.id},
+    },
+    "collecte/<int:collecte_id>/delete/": {"method": "DELETE", "user": "admin", "kwargs": lambda f: {"collecte_id": f.collecte.id}},
+    "collectes/": {"method": "GET", "user": "admin"},
+    "collectes/sync/": {
+        "method": "POST", "user": "bouncer",
+        "data": lambda f: {"operations": [
+            {"op": "create", "sync_id": f"00000000-0000-4000-8000-{i:012d}", "client": f.client.id, "weight_kg": 2}
+            for i in range(20)
+        ]},
+    },
+    "tour/": {"method": "GET", "user": "bouncer", "query": lambda f: {"date": _next_monday().isoformat()}},
+    "changes/": {"method": "GET", "user": "client"},
+    "notifications/": {"method": "GET", "user": "client", "query": lambda f: {"unread": 1}},
+    "notifications/read/": {"method": "POST", "user": "client", "data": lambda f: {"all": True}},
+    "notifications/unread-count/": {"method": "GET", "user": "client"},
+    "notifications/broadcast/": {
+        "method": "POST", "user": "admin",
+        "data": lambda f: {"title": "Bench", "message": "Bench", "channels": ["IN_APP"], "filters": {"city": f.client.city}},
+    },
+    "notifications/broadcast/<int:broadcast_id>/": {
+        "method": "GET", "user": "admin", "kwargs": lambda f: {"broadcast_id": f.broadcast.id if f.broadcast else 0},
+    },
+    "users/": {"method": "GET", "user": "admin"},
+    "payments/": {"method": "GET", "user": "admin"},
+    "subscriptions/": {"method": "GET", "user": "admin"},
+    "subscriptions/nearby/": {
+        "method": "GET", "user": "admin",
+        "query": lambda f: {"lat": f.subscription.latitude, "lon": f.subscription.longitude, "radius_km": 5},
+    },
+    "stats/revenues/": {"method": "GET", "user": "admin"},
+    "stats/subscriptions/": {"method": "GET", "user": "admin"},
+}
+
+
+def _next_monday():
+    today = timezone.localdate()
+    return today + timedelta(days=(7 - today.weekday()) % 7)
+
+
+def _path(route, kwargs):
+    return "/api/" + re.sub(r"<(?:\w+:)?(\w+)>", lambda m: str(kwargs[m.group(1)]), route)
+
+
+def _percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def _call(client, method, path, data, query):
+    if method == "GET":
+        return client.get(path, query or {})
+    if query:
+        path = f"{path}?{urlencode(query)}"
+    with transaction.atomic():
+        response = getattr(client, method.lower())(path, data or {}, format="json")
+        transaction.set_rollback(True)
+    return response
+
+
+def run_benchmark(routes, repeat=20, warmup=2, only=None):
+    """Call every route ``repeat`` times and return one result dict per route.
+
+    ``routes`` are the patterns of api/urls.py. The first (warm-up) call counts
+    queries and response bytes; latencies come from the ``repeat`` timed calls,
+    made without query capture.
+    """
+    fixtures = Fixtures()
+    clients = {}
+    results = []
+    for route in routes:
+        if only and not re.search(only, route):
+            continue
+        spec = ROUTES.get(route)
+        if spec is None:
+            results.append({"route": route, "skipped": "no benchmark spec in api/services/benchmark.py"})
+            continue
+        role = spec.get("user")
+        if role not in clients:
+            client = APIClient()
+            if role:
+                token = RefreshToken.for_user(fixtures.user(role)).access_token
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            clients[role] = client
+        client = clients[role]
+        method = spec["method"]
+        path = _path(route, spec["kwargs"](fixtures) if "kwargs" in spec else {})
+        data = spec["data"](fixtures) if "data" in spec else None
+        query = spec["query"](fixtures) if "query" in spec else None
+
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            response = _call(client, method, path, data, query)
+        # captured_queries slices connection.queries, which the next requests reset
+        queries = sum(len(c.captured_queries) for c in captured)
+        for _ in range(max(warmup - 1, 0)):
+            _call(client, method, path, data, query)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _call(client, method, path, data, query)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results.append({
+            "route": route,
+            "method": method,
+            "user": role,
+            "status": response.status_code,
+            "p50_ms": round(_percentile(timings, 50), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "queries": queries,
+            "bytes": len(response.content),
+        })
+    return results
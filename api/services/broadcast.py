@@ -0,0 +1,93 @@
+# api/services/broadcast.py
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import Notification, User
+from api.services.inbox import INBOX_CHANNEL, add_unread
+
+BROADCAST_CHANNELS = ("IN_APP", "WHATSAPP")
+BROADCAST_FILTERS = ("city", "plan", "videur")
+BROADCAST_CHUNK_SIZE = 1000
+
+
+def broadcast_targets(filters):
+    """Active clients matching {"city", "plan", "videur"} (videur = bouncer whose route serves them)."""
+    qs = User.objects.filter(role="USER", is_active=True)
+    if filters.get("city"):
+        qs = qs.filter(subscription__city__iexact=filters["city"])
+    if filters.get("plan"):
+        qs = qs.filter(subscription__plan__iexact=filters["plan"])
+    if filters.get("videur"):
+        qs = qs.filter(subscription__schedule__videur_id=filters["videur"])
+    return qs
+
+
+def run_broadcast(broadcast, chunk_size=BROADCAST_CHUNK_SIZE, progress=None):
+    """Write one Notification per target user and channel with chunked bulk_create.
+
+    WhatsApp rows are queued in the outbox (delivery_status=pending) and sent by
+    the bounded thread pool of `manage.py whatsapp_worker`. ``progress(done)``
+    is called after each chunk. Returns the number of targeted users.
+    """
+    now = timezone.now()
+    user_ids = broadcast_targets(broadcast.filters).order_by("id").values_list("id", flat=True).iterator(chunk_size=chunk_size)
+    done = 0
+    while True:
+        chunk = list(islice(user_ids, chunk_size))
+        if not chunk:
+            break
+        rows = []
+        for user_id in chunk:
+            for channel in broadcast.channels:
+                queued = channel == "WHATSAPP"
+                rows.append(Notification(
+                    user_id=user_id,
+                    broadcast=broadcast,
+                    title=broadcast.title,
+                    eng_title=broadcast.eng_title,
+                    message=broadcast.message,
+                    eng_message=broadcast.eng_message,
+                    type=broadcast.type,
+                    channel=channel,
+                    delivery_status="pending" if queued else "",
+                    template_name=broadcast.template_name if queued else "",
+                    template_params=broadcast.template_params if queued else [],
+                    next_attempt_at=now if queued else None,
+                ))
+        with transaction.atomic():
+            Notification.objects.bulk_create(rows, batch_size=chunk_size)
+            if INBOX_CHANNEL in broadcast.channels:
+                add_unread(dict.fromkeys(chunk, 1))
+        done += len(chunk)
+        if progress:
+            progress(done)
+
+    broadcast.target_count = done
+    broadcast.completed_at = timezone.now()
+    broadcast.save(update_fields=["target_count", "completed_at"])
+    return done
+
+
+def broadcast_progress(broadcast):
+    """Per-channel counts {created, pending, sent, failed} from one GROUP BY query."""
+    progress = {channel: {"created": 0, "pending": 0, "sent": 0, "failed": 0} for channel in broadcast.channels}
+    rows = (
+        Notification.objects.filter(broadcast=broadcast)
+        .values("channel", "delivery_status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        counts = progress.setdefault(row["channel"], {"created": 0, "pending": 0, "sent": 0, "failed": 0})
+        counts["created"] += row["count"]
+        if row["channel"] == "IN_APP" or row["delivery_status"] == "sent":
+            # in-app notifications are delivered once written
+            counts["sent"] += row["count"]
+        elif row["delivery_status"] == "failed":
+            counts["failed"] += row["count"]
+        else:
+            counts["pending"] += row["count"]
+    return progress
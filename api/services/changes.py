@@ -0,0 +1,133 @@
+# api/services/changes.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Collecte, Notification, Schedule, Subscription, Tombstone
+from api.serializers import (
+    CollecteListSerializer, NotificationSerializer, ScheduleSerializer, SubscriptionSerializer,
+)
+
+
+def _feeds(user):
+    """(name, queryset, serializer) of every model in the feed, scoped like the views.
+
+    Admins see every collecte, schedule and subscription; bouncers the collectes and
+    schedules assigned to them; clients their own rows. Notifications are always the
+    user's own.
+    """
+    if user.role in ("SADMIN", "ADMIN"):
+        collectes, schedules, subscriptions = Q(), Q(), Q()
+    elif user.role == "BOUNCER":
+        collectes, schedules, subscriptions = Q(videur=user), Q(videur=user), Q(client=user)
+    else:
+        collectes, schedules, subscriptions = Q(client=user), Q(subscription__client=user), Q(client=user)
+    return [
+        (
+            "collectes",
+            Collecte.objects.filter(collectes)
+            .select_related("client", "videur", "subscription")
+            .only(*CollecteListSerializer.LIST_FIELDS, "updated_at"),
+            CollecteListSerializer,
+        ),
+        ("schedules", Schedule.objects.filter(schedules).select_related("videur"), ScheduleSerializer),
+        ("subscriptions", Subscription.objects.filter(subscriptions).with_payment_history(), SubscriptionSerializer),
+        ("notifications", Notification.objects.filter(user=user), NotificationSerializer),
+    ]
+
+
+def _tombstones(user):
+    if user.role in ("SADMIN", "ADMIN"):
+        scope = ~Q(model="notification") | Q(owner_id=user.id)
+    elif user.role == "BOUNCER":
+        scope = Q(model__in=("collecte", "schedule"), videur_id=user.id) | Q(
+            model__in=("subscription", "notification"), owner_id=user.id
+        )
+    else:
+        scope = Q(owner_id=user.id)
+    return Tombstone.objects.filter(scope)
+
+
+def _still_visible(user, tombstones):
+    """(model, id) of the tombstoned rows ``user`` sees again: a row reassigned away
+    and back, or reassigned within the scope of an admin, must not be dropped."""
+    ids = {}
+    for t in tombstones:
+        ids.setdefault(t.model, set()).add(t.object_id)
+    visible = set()
+    for name, queryset, _ in _feeds(user):
+        model = name[:-1]
+        if ids.get(model):
+            visible.update((model, pk) for pk in queryset.filter(pk__in=ids[model]).values_list("pk", flat=True))
+    return visible
+
+
+def _page(queryset, field, since, limit):
+    """Rows of ``queryset`` with ``field`` > ``since`` in ``field`` order, at most ``limit``
+    plus the rows sharing the last timestamp, so the next page can start strictly after it.
+
+    Returns (rows, last) where ``last`` is that timestamp if the page was truncated.
+    """
+    if since is not None:
+        queryset = queryset.filter(**{f"{field}__gt": since})
+    rows = list(queryset.order_by(field, "id")[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = getattr(rows[-1], field)
+    rows += list(queryset.filter(**{field: last, "id__gt": rows[-1].id}).order_by("id"))
+    return rows, last
+
+
+def changes_since(user, since=None, limit=None):
+    """Rows visible to ``user`` created or updated after ``since`` plus tombstones of the
+    rows deleted since then, or reassigned out of the user's scope (api.signals).
+
+    ``since`` is the ``watermark`` of the previous response (None for a full sync).
+    The watermark trails the request time by SYNC_WATERMARK_OVERLAP_SECONDS so rows
+    written by transactions still open at that time are sent on the next call; clients
+    upsert by id, so a row may be received twice. When a model has more than ``limit``
+    changes ``has_more`` is set and the watermark stops at the last row returned.
+    """
+    limit = limit or settings.SYNC_FEED_LIMIT
+    now = timezone.now()
+    full = since is None or since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    if full:
+        # first sync, or older than the kept tombstones: the client must replace its data
+        since = None
+    data, truncated = {}, []
+    for name, queryset, serializer_class in _feeds(user):
+        rows, last = _page(queryset, "updated_at", since, limit)
+        if last is not None:
+            truncated.append(last)
+        data[name] = serializer_class(rows, many=True).data
+
+    deleted = []
+    if since is not None:
+        rows, last = _page(_tombstones(user), "deleted_at", since, limit)
+        if last is not None:
+            truncated.append(last)
+        visible = _still_visible(user, rows)
+        deleted = [{"model": t.model, "id": t.object_id} for t in rows if (t.model, t.object_id) not in visible]
+
+    if truncated:
+        # resume after the shortest page; rows of the other models past it are sent again
+        watermark = min(truncated)
+    else:
+        watermark = now - timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP_SECONDS)
+    return {
+        "full": full,
+        "has_more": bool(truncated),
+        "watermark": watermark.isoformat(),
+        **data,
+        "deleted": deleted,
+    }
+
+
+def purge_tombstones(days=None):
+    """Delete tombstones older than ``days`` (SYNC_TOMBSTONE_DAYS); returns the count."""
+    days = days if days is not None else settings.SYNC_TOMBSTONE_DAYS
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
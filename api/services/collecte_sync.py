@@ -0,0 +1,157 @@
+# api/services/collecte_sync.py
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Collecte, Tombstone, User
+from api.serializers import CollecteSyncItemSerializer
+
+UPDATABLE_FIELDS = ("date", "status", "waste_type", "weight_kg")
+
+
+def _local_day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def apply_collecte_sync(user, items):
+    """Apply a batch of offline create/update operations for ``user``.
+
+    Every item is validated first, then each referenced table is read once
+    (clients with their subscription, existing collectes, planned rows), and the
+    accepted operations are written in one transaction with bulk_create /
+    bulk_update. Returns one result dict per item, in order.
+
+    A device retrying after a timeout can race its first request: when the other
+    request commits one of the sync_ids first, the unique constraint rolls the batch
+    back and it is applied again, those creates now resolving to "exists".
+    """
+    try:
+        return _apply(user, items)
+    except IntegrityError:
+        if not _conflicting_sync_ids(items):
+            raise
+        return _apply(user, items)
+
+
+def _conflicting_sync_ids(items):
+    sync_ids = set()
+    for item in items:
+        serializer = CollecteSyncItemSerializer(data=item)
+        if serializer.is_valid() and serializer.validated_data["op"] == "create":
+            sync_ids.add(serializer.validated_data["sync_id"])
+    return sync_ids and Collecte.objects.filter(sync_id__in=sync_ids).exists()
+
+
+def _apply(user, items):
+    results = [None] * len(items)
+    ops = []
+    for index, item in enumerate(items):
+        serializer = CollecteSyncItemSerializer(data=item)
+        if serializer.is_valid():
+            ops.append((index, serializer.validated_data))
+        else:
+            results[index] = {"index": index, "result": "error", "errors": serializer.errors}
+
+    is_admin = user.role in ("SADMIN", "ADMIN")
+    now = timezone.now()
+
+    # one query per referenced table
+    client_ids = {op["client"] for _, op in ops if op["op"] == "create"}
+    clients = {
+        c.id: c for c in User.objects.filter(pk__in=client_ids, role="USER").select_related("subscription")
+    } if client_ids else {}
+
+    ids = {op["id"] for _, op in ops if op.get("id")}
+    sync_ids = {op["sync_id"] for _, op in ops if op.get("sync_id")}
+    existing = list(Collecte.objects.filter(Q(pk__in=ids) | Q(sync_id__in=sync_ids))) if ids or sync_ids else []
+    by_id = {c.id: c for c in existing}
+    by_sync_id = {c.sync_id: c for c in existing if c.sync_id}
+
+    # materialized `scheduled` rows the creates can reuse (see api.services.planning)
+    planned = {}
+    create_days = [_local_day(op.get("date") or now) for _, op in ops if op["op"] == "create"]
+    subscription_ids = {c.subscription.id for c in clients.values() if getattr(c, "subscription", None)}
+    if create_days and subscription_ids:
+        start = timezone.make_aware(datetime.combine(min(create_days), time.min))
+        end = timezone.make_aware(datetime.combine(max(create_days), time.min)) + timedelta(days=1)
+        rows = Collecte.objects.filter(
+            subscription_id__in=subscription_ids, status="scheduled", sync_id__isnull=True,
+            planned_at__gte=start, planned_at__lt=end,
+        ).order_by("planned_at")
+        for row in rows:
+            planned.setdefault((row.subscription_id, _local_day(row.planned_at)), []).append(row)
+
+    to_create, to_update, touched, tombstones = [], {}, {}, []
+
+    def error(index, op, errors):
+        results[index] = {"index": index, "sync_id": op.get("sync_id"), "result": "error", "errors": errors}
+
+    for index, op in ops:
+        if op["op"] == "create":
+            if user.role != "BOUNCER":
+                error(index, op, {"detail": "Only bouncers can create collectes"})
+                continue
+            if op["sync_id"] in by_sync_id:
+                # re-sent by the device: already applied
+                touched[index] = (by_sync_id[op["sync_id"]], "exists")
+                continue
+            client = clients.get(op["client"])
+            if client is None:
+                error(index, op, {"client": ["User not found or not a client"]})
+                continue
+            sub = getattr(client, "subscription", None)
+            if sub is None:
+                error(index, op, {"detail": "Client does not have an active subscription"})
+                continue
+            values = {field: op[field] for field in UPDATABLE_FIELDS if field in op}
+            values.setdefault("date", now)
+            reusable = planned.get((sub.id, _local_day(values["date"])))
+            if reusable:
+                collecte = reusable.pop(0)
+                for field, value in values.items():
+                    setattr(collecte, field, value)
+                if collecte.videur_id not in (None, user.id):
+                    # bulk_update sends no signals: the tombstone of api.signals for the previous bouncer
+                    tombstones.append(Tombstone(model="collecte", object_id=collecte.id, videur_id=collecte.videur_id))
+                collecte.videur = user
+                collecte.sync_id = op["sync_id"]
+                to_update[collecte.id] = collecte
+                touched[index] = (collecte, "created")
+            else:
+                collecte = Collecte(client=client, videur=user, subscription=sub, sync_id=op["sync_id"], **values)
+                to_create.append(collecte)
+                touched[index] = (collecte, "created")
+            by_sync_id[op["sync_id"]] = collecte
+        else:
+            collecte = by_id.get(op.get("id")) if op.get("id") else by_sync_id.get(op.get("sync_id"))
+            if collecte is None:
+                error(index, op, {"detail": "Collecte not found"})
+                continue
+            if not (is_admin or (user.role == "BOUNCER" and collecte.videur_id == user.id)):
+                error(index, op, {"detail": "Forbidden"})
+                continue
+            for field in UPDATABLE_FIELDS:
+                if field in op:
+                    setattr(collecte, field, op[field])
+            if collecte.pk:
+                to_update[collecte.pk] = collecte
+            touched[index] = (collecte, "updated")
+
+    with transaction.atomic():
+        if to_create:
+            Collecte.objects.bulk_create(to_create)
+        if to_update:
+            # bulk_update skips auto_now: bump updated_at for the changes/ feed
+            for collecte in to_update.values():
+                collecte.updated_at = now
+            Collecte.objects.bulk_update(
+                list(to_update.values()), list(UPDATABLE_FIELDS) + ["videur", "sync_id", "updated_at"]
+            )
+        if tombstones:
+            Tombstone.objects.bulk_create(tombstones)
+
+    for index, (collecte, result) in touched.items():
+        results[index] = {"index": index, "sync_id": collecte.sync_id, "id": collecte.pk, "result": result}
+    return results
@@ -0,0 +1,133 @@
+# api/services/geo.py
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from api.models import Subscription
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0088
+NEARBY_FIELDS = (
+    "id", "client_id", "client__name", "client__phone_number",
+    "plan", "address", "city", "latitude", "longitude",
+)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Distances (km) from (lat, lon) to every point of the ``lats``/``lons`` arrays."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _cell_ranges(lat, lon, rings):
+    """geo_cell ranges of the (2*rings+1)^2 block around (lat, lon): one range per grid row."""
+    size = settings.GEO_CELL_DEGREES
+    columns = math.ceil(360 / size)
+    max_row = math.floor(180 / size)
+    row = math.floor((min(max(lat, -90.0), 90.0) + 90) / size)
+    col = math.floor(((lon + 180) % 360) / size)
+    ranges = []
+    for r in range(max(row - rings, 0), min(row + rings, max_row) + 1):
+        lo, hi = col - rings, col + rings
+        if hi - lo + 1 >= columns:
+            ranges.append((r * columns, r * columns + columns - 1))
+            continue
+        if lo >= 0 and hi < columns:
+            spans = [(lo, hi)]
+        else:
+            # the block crosses the antimeridian
+            spans = [(lo % columns, columns - 1), (0, hi % columns)]
+        for a, b in spans:
+            ranges.append((r * columns + a, r * columns + b))
+    return ranges
+
+
+def _covered_km(lat, rings):
+    """Distance from (lat, ·) guaranteed to lie inside the block scanned with ``rings``."""
+    size = settings.GEO_CELL_DEGREES
+    lat_edge = min(abs(lat) + rings * size, 89.9)
+    return rings * size * KM_PER_DEGREE * math.cos(math.radians(lat_edge))
+
+
+def _scan(lat, lon, rings, queryset):
+    q = Q()
+    for lo, hi in _cell_ranges(lat, lon, rings):
+        q |= Q(geo_cell__range=(lo, hi))
+    rows = list(queryset.filter(q).values(*NEARBY_FIELDS))
+    if not rows:
+        return rows, np.empty(0)
+    distances = haversine_km(lat, lon, [r["latitude"] for r in rows], [r["longitude"] for r in rows])
+    return rows, distances
+
+
+def _result(rows, distances, order):
+    results = []
+    for i in order:
+        row = rows[i]
+        results.append({
+            "id": row["id"],
+            "client": {"id": row["client_id"], "name": row["client__name"], "phone_number": row["client__phone_number"]},
+            "plan": row["plan"],
+            "address": row["address"],
+            "city": row["city"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "distance_km": round(float(distances[i]), 3),
+        })
+    return results
+
+
+def within_radius(lat, lon, radius_km, limit=None, queryset=None):
+    """Subscriptions within ``radius_km`` of (lat, lon), closest first.
+
+    Only the grid cells overlapping the radius are read (indexed geo_cell ranges).
+    """
+    queryset = Subscription.objects.all() if queryset is None else queryset
+    rings = 1
+    while _covered_km(lat, rings) < radius_km:
+        rings += 1
+    rows, distances = _scan(lat, lon, rings, queryset)
+    order = [int(i) for i in np.argsort(distances, kind="stable") if distances[i] <= radius_km]
+    return _result(rows, distances, order[:limit] if limit else order)
+
+
+def k_nearest(lat, lon, k, max_radius_km=None, queryset=None):
+    """The ``k`` subscriptions closest to (lat, lon), searching rings of cells outwards
+    until the k-th candidate is provably the k-th nearest (or max_radius_km is reached).
+    """
+    queryset = Subscription.objects.all() if queryset is None else queryset
+    max_radius_km = max_radius_km or settings.GEO_MAX_RADIUS_KM
+    rings = 1
+    while True:
+        rows, distances = _scan(lat, lon, rings, queryset)
+        covered = _covered_km(lat, rings)
+        order = [int(i) for i in np.argsort(distances, kind="stable")]
+        if len(order) >= k and distances[order[k - 1]] <= covered:
+            return _result(rows, distances, order[:k])
+        if covered >= max_radius_km:
+            order = [i for i in order if distances[i] <= max_radius_km]
+            return _result(rows, distances, order[:k])
+        rings *= 2
+
+
+def rebuild_geo_cells(batch_size=1000):
+    """Recompute Subscription.geo_cell for every row; returns the number of rows changed."""
+    changed = 0
+    batch = []
+    for sub in Subscription.objects.only("id", "latitude", "longitude", "geo_cell").iterator(chunk_size=batch_size):
+        cell = Subscription.compute_geo_cell(sub.latitude, sub.longitude)
+        if cell != sub.geo_cell:
+            sub.geo_cell = cell
+            batch.append(sub)
+        if len(batch) >= batch_size:
+            Subscription.objects.bulk_update(batch, ["geo_cell"])
+            changed += len(batch)
+            batch = []
+    if batch:
+        Subscription.objects.bulk_update(batch, ["geo_cell"])
+        changed += len(batch)
+    return changed
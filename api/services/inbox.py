@@ -0,0 +1,70 @@
+# api/services/inbox.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from api.models import Notification, NotificationCounter
+
+# the in-app inbox; WhatsApp rows are outbox copies of the same messages
+INBOX_CHANNEL = "IN_APP"
+
+
+def inbox(user):
+    return Notification.objects.filter(user=user, channel=INBOX_CHANNEL)
+
+
+def add_unread(counts):
+    """Add ``{user_id: n}`` new unread notifications to the counters: one UPDATE per distinct n."""
+    counts = {user_id: n for user_id, n in counts.items() if n > 0}
+    if not counts:
+        return
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread=0) for user_id in counts], ignore_conflicts=True,
+    )
+    by_n = defaultdict(list)
+    for user_id, n in counts.items():
+        by_n[n].append(user_id)
+    for n, user_ids in by_n.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + n)
+
+
+def remove_unread(user_id, n=1):
+    """Subtract ``n`` read / deleted notifications (an UPDATE only: the user may be being deleted)."""
+    NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F("unread") - n, 0))
+
+
+def unread_count(user):
+    """The badge: the counter row, never a COUNT(*)."""
+    return NotificationCounter.objects.filter(user=user).values_list("unread", flat=True).first() or 0
+
+
+def mark_read(user, ids=None):
+    """Mark the user's unread inbox notifications (all of them, or ``ids``) read in one
+    UPDATE, which also bumps updated_at for the changes/ feed. Returns the number marked."""
+    qs = inbox(user).filter(is_read=False)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    with transaction.atomic():
+        marked = qs.update(is_read=True, updated_at=timezone.now())
+        if marked:
+            remove_unread(user.pk, marked)
+    return marked
+
+
+def rebuild_unread_counts():
+    """Recompute every counter from the notifications (after bulk writes that skip
+    api.services.inbox, e.g. generate_data). Returns the number of users with unread ones."""
+    rows = (
+        Notification.objects.filter(channel=INBOX_CHANNEL, is_read=False)
+        .values("user_id").annotate(unread=Count("id")).order_by()
+    )
+    with transaction.atomic():
+        NotificationCounter.objects.all().delete()
+        counters = NotificationCounter.objects.bulk_create(
+            (NotificationCounter(user_id=row["user_id"], unread=row["unread"]) for row in rows.iterator()),
+            batch_size=1000,
+        )
+    return len(counters)
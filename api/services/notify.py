@@ -1,10 +1,27 @@
 # api/services/notify.py
-from api.models import Notification
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from api.models import Notification
 from api.services.whatsapp import send_whatsapp_template
 
+logger = logging.getLogger(__name__)
+
+
 def create_and_send_whatsapp_notification(user,title, message, template_name=None, template_params=None,message_eng="",title_eng=""):
+    """Queue a WhatsApp notification in the outbox and return it immediately.
+
+    The row is written in the caller's transaction; `manage.py whatsapp_worker`
+    delivers it (see deliver_pending_notifications).
+    """
     notif = Notification.objects.create(
         user=user,
         title=title,
@@ -12,19 +29,111 @@ def create_and_send_whatsapp_notification(user,title, message, template_name=Non
         message=message,
         eng_message=message_eng,
         type="SUCCESS",
-        channel="WHATSAPP"
+        channel="WHATSAPP",
+        delivery_status="pending",
+        template_name=template_name or "",
+        template_params=template_params or [],
+        next_attempt_at=timezone.now(),
+    )
+    return notif
+
+
+def claim_pending_notifications(batch_size, worker_id):
+    """Lease up to ``batch_size`` due outbox rows to ``worker_id``.
+
+    Rows are leased by setting them to "sending" with next_attempt_at as the
+    lease end, so rows of a crashed worker are picked up again once it expires.
+    The conditional UPDATE keeps two workers from claiming the same row.
+    """
+    now = timezone.now()
+    due = Q(delivery_status__in=("pending", "sending"), next_attempt_at__lte=now)
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        Notification.objects.filter(due, pk__in=ids).update(
+            delivery_status="sending",
+            claimed_by=worker_id,
+            next_attempt_at=now + timedelta(seconds=settings.WHATSAPP_OUTBOX_LEASE_SECONDS),
+        )
+    return list(
+        Notification.objects.select_related("user").filter(
+            pk__in=ids, delivery_status="sending", claimed_by=worker_id
+        )
     )
 
-    response_meta = None
+
+def _send(notif):
+    """Runs in a worker thread: HTTP only, no ORM access."""
     try:
-        if template_name:
-            response_meta = send_whatsapp_template(user.phone_number, template_name, template_params or [])
+        if notif.template_name:
+            meta = send_whatsapp_template(notif.user.phone_number, notif.template_name, notif.template_params or [])
         else:
             # fallback: use text message (for dev/testing) — note: templates recommended for production
-            response_meta = {"info": "no_template_used", "message": message}
-
-        notif.mark_sent(response_meta)
+            meta = {"info": "no_template_used", "message": notif.message}
+        return notif, meta, None
     except Exception as e:
-        notif.meta = {"error": str(e)}
-        notif.save()
-    return notif
+        return notif, None, e
+
+
+def _release(notif, worker_id, **fields):
+    """Write the outcome of a send and end the lease, unless the lease was lost (it expired
+    and another worker claimed the row): only the columns of the outcome are written."""
+    released = Notification.objects.filter(pk=notif.pk, delivery_status="sending", claimed_by=worker_id).update(
+        claimed_by="", updated_at=timezone.now(), **fields,
+    )
+    if not released:
+        logger.warning("WhatsApp notification %s: lease lost, outcome not recorded", notif.pk)
+    return released
+
+
+def _record_sent(notif, meta, worker_id):
+    fields = {"delivery_status": "sent", "sent": True, "sent_at": timezone.now(), "next_attempt_at": None}
+    if meta:
+        fields["meta"] = meta
+    return _release(notif, worker_id, attempts=notif.attempts + 1, **fields)
+
+
+def _record_failure(notif, error, worker_id):
+    attempts = notif.attempts + 1
+    if attempts >= settings.WHATSAPP_OUTBOX_MAX_ATTEMPTS:
+        status, next_attempt_at = "failed", None
+    else:
+        # exponential backoff with jitter
+        delay = settings.WHATSAPP_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+        status, next_attempt_at = "pending", timezone.now() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+    return _release(
+        notif, worker_id, attempts=attempts, meta={"error": str(error), "attempts": attempts},
+        delivery_status=status, next_attempt_at=next_attempt_at,
+    )
+
+
+def deliver_pending_notifications(batch_size=None, concurrency=None, worker_id=None):
+    """Claim one batch of outbox rows, send them concurrently and record the outcome.
+
+    Returns (sent, failed) counts for the batch.
+    """
+    batch_size = batch_size or settings.WHATSAPP_OUTBOX_BATCH_SIZE
+    concurrency = concurrency or settings.WHATSAPP_OUTBOX_CONCURRENCY
+    worker_id = worker_id or uuid.uuid4().hex
+
+    batch = claim_pending_notifications(batch_size, worker_id)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for notif, meta, error in pool.map(_send, batch):
+            if error is None:
+                _record_sent(notif, meta, worker_id)
+                sent += 1
+            else:
+                logger.warning("WhatsApp notification %s failed: %s", notif.pk, error)
+                _record_failure(notif, error, worker_id)
+                failed += 1
+    return sent, failed
@@ -0,0 +1,111 @@
+# api/services/otp_store.py
+import hmac
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from api.models import OTP
+
+# verify() outcomes
+OTP_OK = "ok"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"
+OTP_LOCKED = "locked"
+
+
+def generate_otp():
+    return str(random.randint(100000, 999999))
+
+
+def _matches(stored, code):
+    # bytes: compare_digest raises TypeError on a str with non-ASCII characters
+    return hmac.compare_digest(str(stored).encode(), str(code).encode())
+
+
+class CacheOTPStore:
+    """OTPs kept in the Django cache (settings.OTP_CACHE_ALIAS).
+
+    The code key expires after OTP_EXPIRATION_SECONDS, a cooldown key after
+    OTP_SEND_COOLDOWN_SECONDS, and failed verifications are counted so the code
+    is dropped after OTP_MAX_ATTEMPTS. Nothing is written to the database.
+    Use a shared backend (redis) in production: locmem is per process.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.OTP_CACHE_ALIAS]
+
+    def _keys(self, phone):
+        return f"otp:code:{phone}", f"otp:cooldown:{phone}", f"otp:attempts:{phone}"
+
+    def issue(self, phone):
+        """Return a new code for ``phone``, or None while the resend cooldown runs."""
+        code_key, cooldown_key, attempts_key = self._keys(phone)
+        if not self.cache.add(cooldown_key, 1, timeout=settings.OTP_SEND_COOLDOWN_SECONDS):
+            return None
+        code = generate_otp()
+        self.cache.set_many({code_key: code, attempts_key: 0}, timeout=settings.OTP_EXPIRATION_SECONDS)
+        return code
+
+    def verify(self, phone, code):
+        code_key, cooldown_key, attempts_key = self._keys(phone)
+        stored = self.cache.get(code_key)
+        if stored is None:
+            return OTP_EXPIRED
+        if not _matches(stored, code):
+            try:
+                attempts = self.cache.incr(attempts_key)
+            except ValueError:
+                attempts = 1
+                self.cache.set(attempts_key, attempts, timeout=settings.OTP_EXPIRATION_SECONDS)
+            if attempts >= settings.OTP_MAX_ATTEMPTS:
+                self.cache.delete(code_key)
+                return OTP_LOCKED
+            return OTP_INVALID
+        # consume the code: of two concurrent verifications only the one that deletes it succeeds
+        if not self.cache.delete(code_key):
+            return OTP_EXPIRED
+        self.cache.delete(attempts_key)
+        return OTP_OK
+
+
+class DBOTPStore:
+    """Fallback store on the OTP table (one row per phone)."""
+
+    def issue(self, phone):
+        otp_entry, created = OTP.objects.get_or_create(phone=phone)
+        # Anti spam (cooldown)
+        if not otp_entry.can_resend() and not created:
+            return None
+        otp_entry.otp = generate_otp()
+        otp_entry.last_sent_at = timezone.now()
+        otp_entry.save()
+        return otp_entry.otp
+
+    def verify(self, phone, code):
+        try:
+            otp_entry = OTP.objects.get(phone=phone)
+        except OTP.DoesNotExist:
+            return OTP_EXPIRED
+        if not _matches(otp_entry.otp, code):
+            return OTP_INVALID
+        if otp_entry.is_expired():
+            return OTP_EXPIRED
+        # consume the row unless a concurrent verification (or a resend) got there first
+        deleted, _ = OTP.objects.filter(pk=otp_entry.pk, otp=otp_entry.otp).delete()
+        return OTP_OK if deleted else OTP_EXPIRED
+
+    def purge_expired(self):
+        """Delete the rows past OTP_EXPIRATION_SECONDS; returns the number deleted."""
+        cutoff = timezone.now() - timedelta(seconds=settings.OTP_EXPIRATION_SECONDS)
+        deleted, _ = OTP.objects.filter(last_sent_at__lt=cutoff).delete()
+        return deleted
+
+
+def get_otp_store():
+    """The store selected by settings.OTP_STORE ("cache" or "db")."""
+    if settings.OTP_STORE == "cache":
+        return CacheOTPStore()
+    return DBOTPStore()
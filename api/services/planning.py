@@ -0,0 +1,67 @@
+# api/services/planning.py
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Collecte, ScheduleSlot
+
+
+def materialize_collectes(days=14, start=None, batch_size=1000):
+    """Create the `scheduled` Collecte rows of every active schedule slot for the next ``days`` days.
+
+    One read pass over ScheduleSlot, then bulk_create with conflict skipping on
+    (subscription, planned_at), so re-runs only insert what is missing.
+    Returns the number of rows inserted.
+    """
+    start = start or timezone.localdate()
+    end = start + timedelta(days=days - 1)
+    dates_by_weekday = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        dates_by_weekday.setdefault(day.isoweekday(), []).append(day)
+
+    window_start = timezone.make_aware(datetime.combine(start, time.min))
+    window_end = timezone.make_aware(datetime.combine(end, time.max))
+
+    slots = (
+        ScheduleSlot.objects.filter(day__in=dates_by_weekday.keys(), schedule__subscription__is_active=True)
+        .filter(Q(schedule__subscription__expires_at__isnull=True) | Q(schedule__subscription__expires_at__gte=window_start))
+        .values_list(
+            "day", "minutes", "schedule__videur_id", "schedule__subscription_id",
+            "schedule__subscription__client_id", "schedule__subscription__expires_at",
+        )
+    )
+
+    rows = []
+    for day, minutes, videur_id, subscription_id, client_id, expires_at in slots.iterator(chunk_size=batch_size):
+        for date in dates_by_weekday[day]:
+            planned_at = timezone.make_aware(datetime.combine(date, time.min) + timedelta(minutes=minutes))
+            if expires_at and planned_at > expires_at:
+                continue
+            rows.append(Collecte(
+                client_id=client_id,
+                videur_id=videur_id,
+                subscription_id=subscription_id,
+                date=planned_at,
+                planned_at=planned_at,
+                status="scheduled",
+            ))
+
+    planned = Collecte.objects.filter(planned_at__range=(window_start, window_end))
+    before = planned.count()
+    Collecte.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return planned.count() - before
+
+
+def find_planned_collecte(subscription, day):
+    """The earliest still `scheduled` materialized collecte of ``subscription`` on ``day``."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return (
+        Collecte.objects.filter(
+            subscription=subscription, status="scheduled",
+            planned_at__gte=start, planned_at__lt=start + timedelta(days=1),
+        )
+        .order_by("planned_at")
+        .first()
+    )
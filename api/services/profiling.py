@@ -0,0 +1,120 @@
+# api/services/profiling.py
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+# <UTC time>-<random>: sorts by capture time, safe to use as a file name
+PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+
+class SQLLog:
+    """execute_wrapper keeping the SQL (without parameters) and duration of each query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                "alias": context["connection"].alias,
+                "sql": sql,
+                "ms": round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+class SlowRequests:
+    """Latency quantile of the recent requests of this process.
+
+    ``is_slow(ms)`` is true for a request in the slowest ``1 - quantile`` share of the
+    last ``window`` requests; nothing counts as slow before ``min_samples`` requests.
+    """
+
+    def __init__(self, quantile, window=10000, min_samples=1000, refresh=500):
+        self.quantile = quantile
+        self.durations = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.refresh = refresh
+        self.threshold = None
+        self._since_refresh = 0
+        self._lock = threading.Lock()
+
+    def record(self, ms):
+        with self._lock:
+            self.durations.append(ms)
+            self._since_refresh += 1
+            if len(self.durations) >= self.min_samples and (self.threshold is None or self._since_refresh >= self.refresh):
+                ordered = sorted(self.durations)
+                self.threshold = ordered[min(int(len(ordered) * self.quantile), len(ordered) - 1)]
+                self._since_refresh = 0
+
+    def is_slow(self, ms):
+        return self.threshold is not None and ms >= self.threshold
+
+
+def _dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(profiler, meta):
+    """Write the pstats dump of ``profiler`` and ``meta`` (JSON) to PROFILE_DIR, drop the
+    oldest captures beyond PROFILE_RING_SIZE and return the new profile id."""
+    path = _dir()
+    profile_id = f"{timezone.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+    # written under a temporary name so a listing never sees half a capture
+    tmp = path / f".{profile_id}.tmp"
+    profiler.dump_stats(tmp)
+    os.replace(tmp, path / f"{profile_id}.prof")
+    tmp.write_text(json.dumps({"id": profile_id, **meta}, default=str))
+    os.replace(tmp, path / f"{profile_id}.json")
+
+    for old in sorted(path.glob("*.json"), reverse=True)[settings.PROFILE_RING_SIZE:]:
+        for stale in (old, old.with_suffix(".prof")):
+            try:
+                stale.unlink()
+            except FileNotFoundError:  # trimmed by another worker
+                pass
+    return profile_id
+
+
+def recent_profiles():
+    """Metadata of the stored captures, newest first, without their SQL log."""
+    profiles = []
+    for meta_path in sorted(_dir().glob("*.json"), reverse=True):
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            continue
+        meta["queries"] = len(meta.get("queries", []))
+        profiles.append(meta)
+    return profiles
+
+
+def load_profile(profile_id):
+    """Metadata and SQL log of a capture, or None."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        return json.loads((_dir() / f"{profile_id}.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def profile_file(profile_id):
+    """Path of the pstats dump of a capture (``python -m pstats <file>``), or None."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = _dir() / f"{profile_id}.prof"
+    return path if path.exists() else None
@@ -0,0 +1,160 @@
+# api/services/routing.py
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from api.models import ScheduleSlot
+
+EARTH_RADIUS_KM = 6371.0088
+
+_matrix_cache = OrderedDict()
+_matrix_cache_lock = threading.Lock()
+
+
+def haversine_matrix(coords):
+    """Pairwise great-circle distances (km) for an (n, 2) array of (lat, lon) degrees."""
+    rad = np.radians(np.asarray(coords, dtype=float))
+    lat, lon = rad[:, 0:1], rad[:, 1:2]
+    dlat = lat - lat.T
+    dlon = lon - lon.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_matrix(coords):
+    """haversine_matrix() memoised per stop set (process-local LRU of ROUTE_MATRIX_CACHE_SIZE)."""
+    key = tuple((round(lat, 6), round(lon, 6)) for lat, lon in coords)
+    with _matrix_cache_lock:
+        if key in _matrix_cache:
+            _matrix_cache.move_to_end(key)
+            return _matrix_cache[key]
+    matrix = haversine_matrix(key)
+    matrix.setflags(write=False)
+    with _matrix_cache_lock:
+        _matrix_cache[key] = matrix
+        while len(_matrix_cache) > settings.ROUTE_MATRIX_CACHE_SIZE:
+            _matrix_cache.popitem(last=False)
+    return matrix
+
+
+def nearest_neighbour(dist, start=0):
+    """Greedy path from ``start`` always moving to the closest unvisited point."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    route = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[route[-1]])
+        nxt = int(np.argmin(row))
+        route.append(nxt)
+        visited[nxt] = True
+    return route
+
+
+def two_opt(route, dist, max_passes=50):
+    """Improve an open path (first point fixed) by segment reversals until no gain.
+
+    For each i the gains of every reversal route[i..j] are computed at once with NumPy.
+    """
+    route = np.asarray(route)
+    n = len(route)
+    if n < 4:
+        return route.tolist()
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            js = np.arange(i + 1, n)
+            c = route[js]
+            removed = dist[a, b] + np.where(js < n - 1, dist[c, route[np.minimum(js + 1, n - 1)]], 0.0)
+            added = dist[a, c] + np.where(js < n - 1, dist[b, route[np.minimum(js + 1, n - 1)]], 0.0)
+            gains = removed - added
+            best = int(np.argmax(gains))
+            if gains[best] > 1e-9:
+                j = js[best]
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+def day_stops(videur, day):
+    """Schedules of ``videur`` with a slot on the weekday of ``day``, as stop dicts."""
+    slots = (
+        ScheduleSlot.objects.filter(day=day.isoweekday(), schedule__videur=videur)
+        .select_related("schedule__subscription__client")
+        .order_by("minutes", "schedule_id")
+    )
+    stops = []
+    for slot in slots:
+        sub = slot.schedule.subscription
+        stops.append({
+            "schedule_id": slot.schedule_id,
+            "subscription_id": sub.id,
+            "client": {"id": sub.client_id, "name": sub.client.name, "phone_number": sub.client.phone_number},
+            "address": sub.address,
+            "latitude": sub.latitude,
+            "longitude": sub.longitude,
+            "slot_time": f"{slot.minutes // 60:02d}:{slot.minutes % 60:02d}",
+            "slot_minutes": slot.minutes,
+        })
+    return stops
+
+
+def plan_tour(stops, start_at, origin=None):
+    """Order ``stops`` (nearest neighbour + 2-opt) and attach leg/cumulative km and ETAs.
+
+    ``origin`` is an optional (lat, lon) depot the tour leaves from; otherwise it
+    starts at the stop with the earliest slot. ETAs assume ROUTE_AVERAGE_SPEED_KMH
+    and ROUTE_SERVICE_MINUTES spent at each stop.
+    """
+    if not stops:
+        return {"stops": [], "total_km": 0.0, "estimated_duration_minutes": 0}
+
+    coords = [(s["latitude"], s["longitude"]) for s in stops]
+    offset = 0
+    if origin is not None:
+        coords = [tuple(origin)] + coords
+        offset = 1
+    dist = distance_matrix(coords)
+
+    route = two_opt(nearest_neighbour(dist, 0), dist)
+    speed = settings.ROUTE_AVERAGE_SPEED_KMH
+    service = timedelta(minutes=settings.ROUTE_SERVICE_MINUTES)
+
+    ordered = []
+    clock = start_at
+    total = 0.0
+    previous = route[0]
+    for index in route:
+        if index < offset:
+            continue
+        leg = float(dist[previous, index])
+        total += leg
+        clock += timedelta(hours=leg / speed) if speed else timedelta()
+        stop = dict(stops[index - offset])
+        stop.pop("slot_minutes", None)
+        stop.update({
+            "order": len(ordered) + 1,
+            "leg_km": round(leg, 3),
+            "cumulative_km": round(total, 3),
+            "eta": clock.isoformat(),
+        })
+        ordered.append(stop)
+        clock += service
+        previous = index
+
+    duration = (clock - start_at).total_seconds() / 60
+    return {"stops": ordered, "total_km": round(total, 3), "estimated_duration_minutes": round(duration)}
+
+
+def tour_start(day, stops, start_time=None):
+    """Aware datetime the tour starts: ``start_time`` (minutes) or the earliest slot of the day."""
+    minutes = start_time if start_time is not None else min((s["slot_minutes"] for s in stops), default=0)
+    naive = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minutes)
+    return timezone.make_aware(naive)
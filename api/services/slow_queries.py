@@ -0,0 +1,116 @@
+# api/services/slow_queries.py
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import SlowQuery
+
+# literals -> ?, IN (?, ?, ...) -> (...), whitespace collapsed: one fingerprint per statement shape
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+# their parameters are secrets (login codes): their statements are not EXPLAINed
+SECRET_TABLES = ("api_otp",)
+
+
+def normalize(sql):
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    """(fingerprint, normalized SQL) of a statement."""
+    normalized = normalize(sql)
+    return hashlib.sha1(normalized.encode()).hexdigest(), normalized
+
+
+class SlowQueryRecorder:
+    """execute_wrapper keeping the statements of one request slower than ``threshold_ms``."""
+
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.slow = []  # (alias, sql, params, many, ms)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            if ms >= self.threshold_ms:
+                self.slow.append((context["connection"].alias, sql, params, many, ms))
+
+
+def param_types(params):
+    """Type names of the bind parameters: the log never keeps their values (phone
+    numbers, OTPs)."""
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    return tuple(type(value).__name__ for value in params or ())
+
+
+def explain(alias, sql, params):
+    """Plan of ``sql`` on ``alias`` (EXPLAIN without ANALYZE: the statement is not run),
+    with the string literals PostgreSQL inlines from ``params`` replaced by ?."""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return ""
+    if any(f'"{table}"' in sql for table in SECRET_TABLES):
+        return ""
+    connection = connections[alias]
+    try:
+        # in a savepoint: a failing EXPLAIN must not break an enclosing transaction
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            rows = cursor.fetchall()
+    except DatabaseError as e:
+        return f"EXPLAIN failed: {e}"
+    # sqlite: (id, parent, notused, detail); postgresql: (line,)
+    return _NORMALIZE[0][0].sub("?", "\n".join(str(row[-1]) for row in rows))
+
+
+def record(view, slow):
+    """Add the statements collected by a SlowQueryRecorder to the SlowQuery table.
+
+    A new fingerprint is dropped once SLOW_QUERY_MAX_FINGERPRINTS are stored; the sample
+    (the statement and the types of its parameters) and plan are those of the slowest occurrence.
+    """
+    now = timezone.now()
+    for alias, sql, params, many, ms in slow:
+        fp, normalized = fingerprint(sql)
+        sample = sql if many else f"{sql} -- params: {param_types(params)!r}"[:4000]
+        max_ms = SlowQuery.objects.filter(fingerprint=fp).values_list("max_ms", flat=True).first()
+        if max_ms is None:
+            if SlowQuery.objects.count() >= settings.SLOW_QUERY_MAX_FINGERPRINTS:
+                continue
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=fp, sql=normalized, sample=sample, view=view,
+                        explain="" if many else explain(alias, sql, params),
+                        count=1, total_ms=ms, max_ms=ms, last_seen=now,
+                    )
+                continue
+            except IntegrityError:  # stored by another worker in the meantime
+                max_ms = 0
+        fields = {"count": F("count") + 1, "total_ms": F("total_ms") + ms, "view": view, "last_seen": now}
+        if ms > max_ms:
+            fields.update(max_ms=ms, sample=sample, explain="" if many else explain(alias, sql, params))
+        SlowQuery.objects.filter(fingerprint=fp).update(**fields)
+
+
+ORDERINGS = {"total": "-total_ms", "max": "-max_ms", "count": "-count", "recent": "-last_seen"}
+
+
+def slow_queries(order="total", limit=50):
+    return SlowQuery.objects.order_by(ORDERINGS[order], "id")[:limit]
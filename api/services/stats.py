@@ -0,0 +1,128 @@
+# api/services/stats.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.models import DailyStat, Payment, Subscription
+
+# fields a row needs to compute its DailyStat contribution
+PAYMENT_FIELDS = ("status", "paid_at", "created_at", "plan", "currency", "city", "amount")
+SUBSCRIPTION_FIELDS = ("started_at", "plan", "currency", "city")
+
+
+def _local_date(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def payment_contribution(values):
+    """((date, plan, currency, city), amount) counted for a payment, or None if it does not count."""
+    if not values or values.get("status") != "success":
+        return None
+    when = values.get("paid_at") or values.get("created_at")
+    if when is None:
+        return None
+    key = (_local_date(when), values.get("plan"), values.get("currency"), values.get("city") or "")
+    return key, Decimal(values.get("amount") or 0)
+
+
+def subscription_contribution(values):
+    """(date, plan, currency, city) counted for a subscription, or None."""
+    if not values or values.get("started_at") is None:
+        return None
+    return (_local_date(values["started_at"]), values.get("plan"), values.get("currency"), values.get("city") or "")
+
+
+def bump(key, revenue=0, payments=0, subscriptions=0):
+    """Add the deltas to the DailyStat row of ``key`` with a single F() UPDATE."""
+    day, plan, currency, city = key
+    with transaction.atomic():
+        stat, _ = DailyStat.objects.get_or_create(date=day, plan=plan, currency=currency, city=city)
+        DailyStat.objects.filter(pk=stat.pk).update(
+            revenue=F("revenue") + revenue,
+            payments_count=F("payments_count") + payments,
+            subscriptions_count=F("subscriptions_count") + subscriptions,
+        )
+
+
+def rebuild_daily_stats():
+    """Recompute every DailyStat row from Payment and Subscription (two GROUP BY queries)."""
+    rows = {}
+
+    def row(key):
+        if key not in rows:
+            day, plan, currency, city = key
+            rows[key] = DailyStat(date=day, plan=plan, currency=currency, city=city)
+        return rows[key]
+
+    payments = (
+        Payment.objects.filter(status="success")
+        .annotate(day=TruncDate(Coalesce("paid_at", "created_at")))
+        .values("day", "plan", "currency", "city")
+        .annotate(revenue=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    for p in payments:
+        stat = row((p["day"], p["plan"], p["currency"], p["city"]))
+        stat.revenue = p["revenue"] or 0
+        stat.payments_count = p["count"]
+
+    subscriptions = (
+        Subscription.objects.annotate(day=TruncDate("started_at"))
+        .values("day", "plan", "currency", "city")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for s in subscriptions:
+        row((s["day"], s["plan"], s["currency"], s["city"])).subscriptions_count = s["count"]
+
+    with transaction.atomic():
+        DailyStat.objects.all().delete()
+        DailyStat.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def period_filters(today, date_from=None, date_to=None):
+    """Q objects for the day / month / year windows of ``today`` (plus an optional range)."""
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    periods = {
+        "daily": Q(date=today),
+        "monthly": Q(date__gte=month_start, date__lt=next_month),
+        "yearly": Q(date__gte=date(today.year, 1, 1), date__lt=date(today.year + 1, 1, 1)),
+        "total": Q(),
+    }
+    if date_from or date_to:
+        range_q = Q()
+        if date_from:
+            range_q &= Q(date__gte=date_from)
+        if date_to:
+            range_q &= Q(date__lte=date_to)
+        periods["range"] = range_q
+    return periods
+
+
+def revenue_stats(date_from=None, date_to=None, **filters):
+    qs = DailyStat.objects.filter(**filters)
+    periods = period_filters(timezone.localdate(), date_from, date_to)
+    totals = qs.aggregate(**{name: Sum("revenue", filter=q) for name, q in periods.items()})
+    data = {name: str(totals[name] or 0) for name in periods}
+    data["currency"] = qs.filter(payments_count__gt=0).order_by("-date").values_list("currency", flat=True).first() or "XAF"
+    return data
+
+
+def subscription_stats(date_from=None, date_to=None, **filters):
+    qs = DailyStat.objects.filter(**filters)
+    periods = period_filters(timezone.localdate(), date_from, date_to)
+    totals = qs.aggregate(**{name: Sum("subscriptions_count", filter=q) for name, q in periods.items()})
+    data = {name: totals[name] or 0 for name in periods}
+    by_plan = qs
+    if "range" in periods:
+        by_plan = by_plan.filter(periods["range"])
+    data["by_plan"] = list(
+        by_plan.values("plan").annotate(count=Sum("subscriptions_count")).filter(count__gt=0).order_by("-count")
+    )
+    return data
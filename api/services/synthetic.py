@@ -0,0 +1,215 @@
+# api/services/synthetic.py
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from api.models import (
+    Broadcast, Collecte, Notification, Payment, Schedule, ScheduleSlot, Subscription, User,
+)
+from api.services.inbox import rebuild_unread_counts
+from api.services.stats import rebuild_daily_stats
+
+# (name, latitude, longitude, share of the clients)
+CITIES = [
+    ("Douala", 4.0511, 9.7679, 0.40),
+    ("Yaoundé", 3.8480, 11.5021, 0.35),
+    ("Bafoussam", 5.4781, 10.4176, 0.10),
+    ("Bamenda", 5.9631, 10.1591, 0.08),
+    ("Garoua", 9.3017, 13.3921, 0.07),
+]
+PLANS = ["FREE", "STARTER", "PRO", "PREMIUM"]
+PLAN_SHARES = [0.35, 0.30, 0.25, 0.10]
+PLAN_PRICES = {"FREE": 0, "STARTER": 2000, "PRO": 5000, "PREMIUM": 15000}
+WASTE_TYPES = [choice for choice, _ in Collecte.WASTE_CHOICES]
+DAY = 86400.0
+
+
+@contextmanager
+def explicit_timestamps(model, *names):
+    """Let bulk_create keep the values given to auto_now_add fields (historical rows)."""
+    fields = [model._meta.get_field(name) for name in names]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _ago(now, seconds):
+    return [now - timedelta(seconds=float(s)) for s in seconds]
+
+
+def _chunks(n, size):
+    for start in range(0, n, size):
+        yield start, min(start + size, n)
+
+
+def generate(clients=1000, bouncers=20, years=2, notifications=5, seed=42, batch_size=2000, phone_prefix="+23765", log=None):
+    """Insert a realistic synthetic dataset and return the number of rows per model.
+
+    Values are drawn as NumPy arrays (one draw per column) and written with
+    bulk_create in ``batch_size`` chunks; signals do not run, so DailyStat and the
+    unread counters are rebuilt at the end. Collectes follow each schedule's weekly
+    frequency since the subscription started (up to ``years`` ago), payments are monthly.
+    """
+    log = log or (lambda message: None)
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+    password = make_password(None)
+    counts = {}
+
+    # users: one admin, the bouncers, the clients
+    offset = User.objects.filter(phone_number__startswith=phone_prefix).count()
+    total = 1 + bouncers + clients
+    phones = [f"{phone_prefix}{offset + i:07d}" for i in range(total)]
+    city_index = rng.choice(len(CITIES), size=total, p=[c[3] for c in CITIES])
+    roles = ["ADMIN"] + ["BOUNCER"] * bouncers + ["USER"] * clients
+    users = User.objects.bulk_create(
+        [
+            User(
+                phone_number=phones[i], role=roles[i], name=f"{roles[i].title()} {offset + i}",
+                city=CITIES[city_index[i]][0], country="Cameroun", password=password,
+            )
+            for i in range(total)
+        ],
+        batch_size=batch_size,
+    )
+    bouncer_ids = np.array([u.id for u in users[1:1 + bouncers]])
+    client_users = users[1 + bouncers:]
+    client_cities = city_index[1 + bouncers:]
+    counts["users"] = len(users)
+    log(f"{len(users)} users")
+
+    # subscriptions, scattered around the city centres
+    plan_index = rng.choice(len(PLANS), size=clients, p=PLAN_SHARES)
+    started_ago = rng.uniform(0, years * 365 * DAY, size=clients)
+    centres = np.array([(c[1], c[2]) for c in CITIES])[client_cities]
+    coords = centres + rng.normal(0, 0.03, size=(clients, 2))
+    expires_in = rng.uniform(-10 * DAY, 30 * DAY, size=clients)
+    active = rng.random(clients) < 0.9
+    started = _ago(now, started_ago)
+    subs = []
+    for i, user in enumerate(client_users):
+        plan = PLANS[plan_index[i]]
+        lat, lon = float(coords[i, 0]), float(coords[i, 1])
+        subs.append(Subscription(
+            client=user, plan=plan, started_at=started[i], expires_at=now + timedelta(seconds=float(expires_in[i])),
+            is_active=bool(active[i]), collection_frequency=Subscription.PLAN_FREQUENCY[plan],
+            latitude=lat, longitude=lon, geo_cell=Subscription.compute_geo_cell(lat, lon),
+            address=f"{rng.integers(1, 400)} rue {rng.integers(1, 90)}", city=user.city,
+            price=PLAN_PRICES[plan], currency="XAF",
+        ))
+    with explicit_timestamps(Subscription, "started_at"):
+        subs = Subscription.objects.bulk_create(subs, batch_size=batch_size)
+    counts["subscriptions"] = len(subs)
+    log(f"{len(subs)} subscriptions")
+
+    # schedules for 90% of the subscriptions: `frequency` distinct weekdays, one time for all
+    scheduled = np.flatnonzero(rng.random(clients) < 0.9)
+    videurs = rng.choice(bouncer_ids, size=len(scheduled)) if bouncers else [None] * len(scheduled)
+    weekday_order = np.argsort(rng.random((len(scheduled), 7)), axis=1) + 1
+    minutes = rng.integers(24, 72, size=len(scheduled)) * 15  # 06:00 .. 17:45
+    schedules = []
+    for n, i in enumerate(scheduled):
+        days = sorted(weekday_order[n, :subs[i].collection_frequency].tolist())
+        time = f"{minutes[n] // 60:02d}:{minutes[n] % 60:02d}"
+        schedules.append(Schedule(
+            subscription=subs[i], videur_id=None if videurs[n] is None else int(videurs[n]),
+            slots=[{"day": ScheduleSlot.WEEKDAYS[d - 1], "time": time} for d in days],
+        ))
+    schedules = Schedule.objects.bulk_create(schedules, batch_size=batch_size)
+    ScheduleSlot.objects.bulk_create(
+        [ScheduleSlot(schedule=s, day=ScheduleSlot.day_number(slot["day"]), minutes=int(minutes[n]))
+         for n, s in enumerate(schedules) for slot in s.slots],
+        batch_size=batch_size,
+    )
+    counts["schedules"] = len(schedules)
+    log(f"{len(schedules)} schedules")
+
+    # collectes: frequency per week since the subscription started, on scheduled subscriptions
+    freq = np.array([subs[i].collection_frequency for i in scheduled])
+    age = started_ago[scheduled]
+    per_sub = np.floor(age / (7 * DAY) * freq).astype(int)
+    owner = np.repeat(np.arange(len(scheduled)), per_sub)
+    when = rng.random(len(owner)) * age[owner]
+    status = rng.choice(["completed", "missed", "in_progress"], size=len(owner), p=[0.85, 0.1, 0.05])
+    waste = rng.choice(WASTE_TYPES, size=len(owner))
+    weight = np.round(rng.gamma(2.0, 4.0, size=len(owner)), 1)
+    counts["collectes"] = 0
+    for start, end in _chunks(len(owner), batch_size):
+        dates = _ago(now, when[start:end])
+        rows = []
+        for k in range(start, end):
+            schedule = schedules[owner[k]]
+            sub = subs[scheduled[owner[k]]]
+            rows.append(Collecte(
+                client_id=sub.client_id, videur_id=schedule.videur_id, subscription=sub,
+                date=dates[k - start], created_at=dates[k - start], status=status[k],
+                waste_type=waste[k], weight_kg=float(weight[k]),
+            ))
+        Collecte.objects.bulk_create(rows)
+        counts["collectes"] += len(rows)
+    log(f"{counts['collectes']} collectes")
+
+    # monthly payments of the paid plans
+    paid = np.flatnonzero(plan_index > 0)
+    months = np.ceil(started_ago[paid] / (30 * DAY)).astype(int)
+    payer = np.repeat(paid, months)
+    month = np.concatenate([np.arange(m) for m in months]) if len(months) else np.array([], dtype=int)
+    created_ago = started_ago[payer] - month * 30 * DAY
+    pay_status = rng.choice(["success", "failed", "pending"], size=len(payer), p=[0.92, 0.05, 0.03])
+    paid_delay = rng.uniform(0, 7200, size=len(payer))
+    counts["payments"] = 0
+    with explicit_timestamps(Payment, "created_at"):
+        for start, end in _chunks(len(payer), batch_size):
+            created = _ago(now, created_ago[start:end])
+            rows = []
+            for k in range(start, end):
+                sub = subs[payer[k]]
+                created_at = created[k - start]
+                rows.append(Payment(
+                    client_id=sub.client_id, subscription=sub, plan=sub.plan, city=sub.city,
+                    amount=sub.price, currency=sub.currency, gateway="synthetic", status=pay_status[k],
+                    created_at=created_at,
+                    paid_at=created_at + timedelta(seconds=float(paid_delay[k])) if pay_status[k] == "success" else None,
+                ))
+            Payment.objects.bulk_create(rows)
+            counts["payments"] += len(rows)
+    log(f"{counts['payments']} payments")
+
+    # in-app notifications over the last 90 days, part of them from one announcement
+    broadcast = Broadcast.objects.create(
+        created_by=users[0], title="Annonce", message="Collecte exceptionnelle ce samedi",
+        eng_title="Announcement", eng_message="Special collection this Saturday",
+        channels=["IN_APP"], target_count=clients, completed_at=now,
+    )
+    per_user = rng.poisson(notifications, size=clients)
+    recipient = np.repeat(np.arange(clients), per_user)
+    sent_ago = rng.uniform(0, 90 * DAY, size=len(recipient))
+    read = rng.random(len(recipient)) < 0.7
+    from_broadcast = rng.random(len(recipient)) < 0.3
+    counts["notifications"] = 0
+    with explicit_timestamps(Notification, "created_at"):
+        for start, end in _chunks(len(recipient), batch_size):
+            created = _ago(now, sent_ago[start:end])
+            rows = [
+                Notification(
+                    user=client_users[recipient[k]], title="Collecte", message="Votre collecte est prévue",
+                    eng_title="Pickup", eng_message="Your pickup is scheduled", type="INFO", channel="IN_APP",
+                    is_read=bool(read[k]), created_at=created[k - start],
+                    broadcast=broadcast if from_broadcast[k] else None,
+                )
+                for k in range(start, end)
+            ]
+            Notification.objects.bulk_create(rows)
+            counts["notifications"] += len(rows)
+    log(f"{counts['notifications']} notifications")
+
+    counts["daily_stats"] = rebuild_daily_stats()
+    counts["unread_counters"] = rebuild_unread_counts()
+    return counts
@@ -1,35 +1,85 @@
-import random
+import os
+import threading
+import time
 import requests
-from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 import logging
-from api.models import OTP
+from api.metrics import OTP_SENT, OTP_VERIFIED, WHATSAPP_SEND_FAILURES, WHATSAPP_SEND_LATENCY
+from api.services.otp_store import OTP_EXPIRED, OTP_INVALID, OTP_LOCKED, OTP_OK, get_otp_store
 
 logger = logging.getLogger(__name__)
 
-def generate_otp():
-    return str(random.randint(100000, 999999))
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
 
 
-def send_otp_whatsapp(phone):
-    otp_entry, created = OTP.objects.get_or_create(phone=phone)
+def get_meta_session():
+    """Per-process pooled keep-alive session for the Meta Graph API.
 
-    # Anti spam (cooldown)
-    if not otp_entry.can_resend() and not created:
-        return {"status": "error", "message": "Attendez quelques secondes avant de renvoyer un OTP"}
+    Connections to graph.facebook.com are reused across messages instead of a
+    TCP+TLS handshake per call. 429/5xx are retried with exponential backoff and
+    jitter (Retry-After is honoured). Recreated after a fork (gunicorn workers).
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                retry = Retry(
+                    total=settings.META_HTTP_RETRIES,
+                    connect=settings.META_HTTP_RETRIES,
+                    read=0,  # a timed out send may have been delivered: do not resend it
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=None,  # Graph API sends are POSTs
+                    backoff_factor=0.3,
+                    backoff_jitter=0.3,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.META_HTTP_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def meta_post(payload):
+    """POST a message payload to /<META_PHONE_ID>/messages through the pooled session."""
+    url = f"{settings.META_GRAPH_URL.rstrip('/')}/{settings.META_PHONE_ID}/messages"
+    headers = {"Authorization": f"Bearer {settings.META_WA_TOKEN}"}
+    start = time.perf_counter()
+    try:
+        resp = get_meta_session().post(
+            url,
+            json=payload,
+            headers=headers,
+            timeout=(settings.META_HTTP_CONNECT_TIMEOUT, settings.META_HTTP_READ_TIMEOUT),
+        )
+    except requests.RequestException as e:
+        WHATSAPP_SEND_FAILURES.labels(reason=type(e).__name__).inc()
+        raise
+    finally:
+        WHATSAPP_SEND_LATENCY.observe(time.perf_counter() - start)
+    if resp.status_code >= 400:
+        WHATSAPP_SEND_FAILURES.labels(reason=str(resp.status_code)).inc()
+    return resp
 
-    otp_value = generate_otp()
-    otp_entry.otp = otp_value
-    otp_entry.last_sent_at = timezone.now()
-    otp_entry.save()
 
-    # Requête API Meta WhatsApp
-    url = f"https://graph.facebook.com/v22.0/863349426864550/messages"
-    headers = {
-        "Authorization": f"Bearer EAAMNQbohC3wBQbrQNeqkMDEP08ZCsai7I8pv8SoMWw8FxqnDEns1zdGJKgyf0pPdQXGgFFqbkn8LuigPa79QS5XYoIZB2foWTsW7GTAtPZBsDqbgnuJf86pwJuiWy0tFzxYqgSWtSGzjV4my71N5LmJUq8ClfRymDIEqY8qMn4k0JVduJzlhgSSf4f7986gSejcNYgNkaXynkLg6a6R3Ea1hJsPpZCmWbUDW6mMvQ6m74MMbtDJlZBnENJc3vSfOmohHZA8pMxvgKKXmVDcyZAQgtfA",
-        "Content-Type": "application/json"
-    }
+def send_otp_whatsapp(phone):
+    # code + anti spam cooldown (cache or OTP table, see settings.OTP_STORE)
+    otp_value = get_otp_store().issue(phone)
+    if otp_value is None:
+        OTP_SENT.labels(outcome="cooldown").inc()
+        return {"status": "error", "message": "Attendez quelques secondes avant de renvoyer un OTP"}
 
+    # Requête API Meta WhatsApp
     payload = {    "messaging_product": "whatsapp",
     "to": "237671434007",
     "type": "template",
@@ -38,29 +88,28 @@ def send_otp_whatsapp(phone):
       "language": { "code": "en_US" }
     }}
 
-    res = requests.post(url, json=payload, headers=headers)
-    print(otp_value)
+    try:
+        res = meta_post(payload)
+    except requests.RequestException:
+        OTP_SENT.labels(outcome="whatsapp_error").inc()
+        raise
     if res.status_code >= 400:
+        OTP_SENT.labels(outcome="whatsapp_error").inc()
+        logger.warning("OTP send failed", extra={"phone": f"***{phone[-3:]}", "status": res.status_code})
         return {"status": "error", "message": "Erreur WhatsApp", "details": res.json()}
-    
+
+    OTP_SENT.labels(outcome="sent").inc()
+    logger.info("OTP sent", extra={"phone": f"***{phone[-3:]}"})
     return {"status": "success"}
 
 
 def verify_otp(phone, otp):
-    try:
-        otp_entry = OTP.objects.get(phone=phone)
-    except OTP.DoesNotExist:
-        return {"status": "error", "message": "OTP non trouvé"}
-
-    if otp_entry.is_expired():
-        return {"status": "error", "message": "OTP expiré"}
-
-    if otp_entry.otp != otp:
-        return {"status": "error", "message": "OTP incorrect"}
-
-    # Si tout est bon
-    otp_entry.delete()
-    return {"status": "success"}
+    result = get_otp_store().verify(phone, otp)
+    OTP_VERIFIED.labels(outcome=result).inc()
+    if result == OTP_OK:
+        return {"status": "success"}
+    messages = {OTP_EXPIRED: "OTP expiré", OTP_INVALID: "OTP incorrect", OTP_LOCKED: "Trop de tentatives, demandez un nouvel OTP"}
+    return {"status": "error", "message": messages[result]}
 
 
 
@@ -72,12 +121,6 @@ def send_whatsapp_template(to_phone: str, template_name: str, parameters: list,
     """
 
 
-    url = f"https://graph.facebook.com/v22.0/863349426864550/messages"
-    headers = {
-        "Authorization": f"Bearer EAAMNQbohC3wBQbrQNeqkMDEP08ZCsai7I8pv8SoMWw8FxqnDEns1zdGJKgyf0pPdQXGgFFqbkn8LuigPa79QS5XYoIZB2foWTsW7GTAtPZBsDqbgnuJf86pwJuiWy0tFzxYqgSWtSGzjV4my71N5LmJUq8ClfRymDIEqY8qMn4k0JVduJzlhgSSf4f7986gSejcNYgNkaXynkLg6a6R3Ea1hJsPpZCmWbUDW6mMvQ6m74MMbtDJlZBnENJc3vSfOmohHZA8pMxvgKKXmVDcyZAQgtfA",
-        "Content-Type": "application/json"
-    }
-
     payload = {    "messaging_product": "whatsapp",
     "to": "237671434007",
     "type": "template",
@@ -111,6 +154,6 @@ def send_whatsapp_template(to_phone: str, template_name: str, parameters: list,
     #     }
     # }
 
-    resp = requests.post(url, json=payload, headers=headers, timeout=15)
+    resp = meta_post(payload)
     resp.raise_for_status()
     return resp.json()
\ No newline at end of file
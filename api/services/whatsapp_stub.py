@@ -0,0 +1,57 @@
+# api/services/whatsapp_stub.py
+"""Local stand-in for the Meta Graph API messages endpoint.
+
+Used by `manage.py whatsapp_stub` / `manage.py whatsapp_bench` to measure the
+WhatsApp client offline: point settings.META_GRAPH_URL at it.
+"""
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like graph.facebook.com
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    latency = 0.0
+    error_rate = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.error_rate and random.random() < self.error_rate:
+            status, data = 503, {"error": {"message": "stub: service unavailable", "code": 2}}
+        elif not self.path.endswith("/messages"):
+            status, data = 404, {"error": {"message": "stub: unknown path", "code": 100}}
+        else:
+            try:
+                to = json.loads(body or b"{}").get("to", "")
+            except ValueError:
+                to = ""
+            status, data = 200, {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": to, "wa_id": to}],
+                "messages": [{"id": f"wamid.stub.{uuid.uuid4().hex}"}],
+            }
+
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_stub_server(host="127.0.0.1", port=0, latency=0.0, error_rate=0.0):
+    """Return a ThreadingHTTPServer (not started); port=0 picks a free port."""
+    handler = type("ConfiguredStubGraphHandler", (StubGraphHandler,), {"latency": latency, "error_rate": error_rate})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
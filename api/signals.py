@@ -0,0 +1,189 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.authentication import invalidate_user
+from api.models import Collecte, Notification, Payment, Schedule, Subscription, Tombstone, User
+from api.services import stats
+from api.services.inbox import INBOX_CHANNEL, add_unread, remove_unread
+
+
+def _values(instance, fields):
+    return {name: getattr(instance, name) for name in fields}
+
+
+def _load_previous(sender, instance, fields):
+    """Make sure ``instance._loaded_values`` holds the stored values of ``fields``."""
+    if instance._state.adding or not instance.pk:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if all(name in loaded for name in fields):
+        return
+    # deferred fields (only()/defer()): read the stored row before it is overwritten
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._loaded_values = {**loaded, **(stored or {})}
+
+
+def _previous(instance, created):
+    if created:
+        return None
+    return getattr(instance, "_loaded_values", None)
+
+
+# -------------------------
+# DailyStat rollups
+# -------------------------
+@receiver(pre_save, sender=Payment)
+def payment_pre_save(sender, instance, **kwargs):
+    _load_previous(sender, instance, stats.PAYMENT_FIELDS)
+
+
+@receiver(post_save, sender=Payment)
+def payment_rollup(sender, instance, created, **kwargs):
+    old = stats.payment_contribution(_previous(instance, created))
+    new_values = _values(instance, stats.PAYMENT_FIELDS)
+    new = stats.payment_contribution(new_values)
+    if old != new:
+        if old:
+            stats.bump(old[0], revenue=-old[1], payments=-1)
+        if new:
+            stats.bump(new[0], revenue=new[1], payments=1)
+    instance._loaded_values = new_values
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_touch_subscription(sender, instance, **kwargs):
+    # the serialized subscription embeds its payments: bump its version (changes/ feed, ETags)
+    if instance.subscription_id:
+        Subscription.objects.filter(pk=instance.subscription_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Payment)
+def payment_rollup_delete(sender, instance, **kwargs):
+    old = stats.payment_contribution(getattr(instance, "_loaded_values", None) or _values(instance, stats.PAYMENT_FIELDS))
+    if old:
+        stats.bump(old[0], revenue=-old[1], payments=-1)
+
+
+@receiver(pre_save, sender=Subscription)
+def subscription_pre_save(sender, instance, **kwargs):
+    _load_previous(sender, instance, stats.SUBSCRIPTION_FIELDS)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_rollup(sender, instance, created, **kwargs):
+    old = stats.subscription_contribution(_previous(instance, created))
+    new_values = _values(instance, stats.SUBSCRIPTION_FIELDS)
+    new = stats.subscription_contribution(new_values)
+    if old != new:
+        if old:
+            stats.bump(old, subscriptions=-1)
+        if new:
+            stats.bump(new, subscriptions=1)
+    instance._loaded_values = new_values
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_rollup_delete(sender, instance, **kwargs):
+    old = stats.subscription_contribution(getattr(instance, "_loaded_values", None) or _values(instance, stats.SUBSCRIPTION_FIELDS))
+    if old:
+        stats.bump(old, subscriptions=-1)
+
+
+# -------------------------
+# changes/ feed tombstones
+# -------------------------
+@receiver(post_delete, sender=Collecte)
+def collecte_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model="collecte", object_id=instance.pk, owner_id=instance.client_id, videur_id=instance.videur_id)
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_tombstone(sender, instance, **kwargs):
+    # runs before the subscription of a cascade is deleted, so the owner can still be read
+    owner_id = Subscription.objects.filter(pk=instance.subscription_id).values_list("client_id", flat=True).first()
+    Tombstone.objects.create(model="schedule", object_id=instance.pk, owner_id=owner_id, videur_id=instance.videur_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model="subscription", object_id=instance.pk, owner_id=instance.client_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model="notification", object_id=instance.pk, owner_id=instance.user_id)
+
+
+# rows leaving the scope of a user (reassigned to another bouncer or client) get a tombstone
+# for that user only; changes_since drops the tombstones of rows the reader still sees
+def _scope_left(sender, instance, fields):
+    """{field: stored value} of the scope ``fields`` this save changes (nothing on create)."""
+    if instance._state.adding or not instance.pk:
+        return {}
+    _load_previous(sender, instance, fields)
+    stored = instance._loaded_values
+    left = {name: stored[name] for name in fields if stored.get(name) not in (None, getattr(instance, name))}
+    instance._loaded_values = {**stored, **_values(instance, fields)}
+    return left
+
+
+@receiver(pre_save, sender=Collecte)
+def collecte_scope_tombstone(sender, instance, **kwargs):
+    left = _scope_left(sender, instance, ("client_id", "videur_id"))
+    if left:
+        Tombstone.objects.create(
+            model="collecte", object_id=instance.pk, owner_id=left.get("client_id"), videur_id=left.get("videur_id"),
+        )
+
+
+@receiver(pre_save, sender=Schedule)
+def schedule_scope_tombstone(sender, instance, **kwargs):
+    left = _scope_left(sender, instance, ("videur_id",))
+    if left:
+        Tombstone.objects.create(model="schedule", object_id=instance.pk, videur_id=left["videur_id"])
+
+
+@receiver(pre_save, sender=Subscription)
+def subscription_scope_tombstone(sender, instance, **kwargs):
+    left = _scope_left(sender, instance, ("client_id",))
+    if left:
+        # the schedule is scoped through its subscription's client
+        Tombstone.objects.bulk_create(
+            [Tombstone(model="subscription", object_id=instance.pk, owner_id=left["client_id"])]
+            + [
+                Tombstone(model="schedule", object_id=pk, owner_id=left["client_id"])
+                for pk in Schedule.objects.filter(subscription=instance).values_list("pk", flat=True)
+            ]
+        )
+
+
+# -------------------------
+# inbox unread counters (bulk_create callers update them themselves)
+# -------------------------
+@receiver(post_save, sender=Notification)
+def notification_count_unread(sender, instance, created, **kwargs):
+    if created and instance.channel == INBOX_CHANNEL and not instance.is_read:
+        add_unread({instance.user_id: 1})
+
+
+@receiver(post_delete, sender=Notification)
+def notification_uncount_unread(sender, instance, **kwargs):
+    if instance.channel == INBOX_CHANNEL and not instance.is_read:
+        remove_unread(instance.user_id)
+
+
+# -------------------------
+# authenticated user cache
+# -------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_cache_invalidate(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def subscription_cache_invalidate(sender, instance, **kwargs):
+    invalidate_user(instance.client_id)
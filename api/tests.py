@@ -1,3 +1,525 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Collecte, DailyStat, Notification, Payment, Schedule, ScheduleSlot, Subscription, User
+from api.services.otp_store import OTP_EXPIRED, OTP_INVALID, OTP_LOCKED, OTP_OK, CacheOTPStore, DBOTPStore
+
+
+def explain(sql):
+    """Plan lines of ``sql`` on the test database."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+        rows = cursor.fetchall()
+    # sqlite: (id, parent, notused, detail); postgresql: (line,)
+    return [str(row[-1]) for row in rows]
+
+
+def sorts(plan):
+    """Plan lines sorting rows instead of reading them in index order."""
+    return [line for line in plan if "TEMP B-TREE" in line or re.match(r"\s*(->\s*)?(Incremental )?Sort\b", line)]
+
+
+def pk_walk(sql, plan):
+    """Table of a keyset page read in primary key order (``ORDER BY "t"."id" DESC LIMIT n``
+    without a sort): SQLite shows it as a bare SCAN, but it stops after ``n`` rows."""
+    match = re.search(r'ORDER BY "(\w+)"\."id" (?:ASC|DESC) LIMIT \d+$', sql)
+    return match.group(1) if match and not sorts(plan) else None
+
+
+def full_scans(plan, sql=""):
+    """Tables read without an index in ``plan`` (the statement ``sql``: a primary key walk
+    of a LIMIT page is not a full scan)."""
+    tables = []
+    walked = pk_walk(sql, plan)
+    for line in plan:
+        sqlite = re.match(r"\s*SCAN (?:TABLE )?(\w+)(.*)", line)
+        if sqlite and "USING" not in sqlite.group(2) and sqlite.group(1) != walked and not sqlite.group(1).startswith("sqlite_"):
+            tables.append(sqlite.group(1))
+        postgres = re.search(r"Seq Scan on (\w+)", line)
+        if postgres:
+            tables.append(postgres.group(1))
+    return tables
+
+
+class OTPStoreTests(TestCase):
+    """Both stores: resend cooldown, single use, bad codes; the cache store also locks
+    the code after OTP_MAX_ATTEMPTS failures."""
+    PHONE = "237600000001"
+
+    def setUp(self):
+        cache.clear()
+
+    def stores(self):
+        return [CacheOTPStore(), DBOTPStore()]
+
+    def test_cooldown(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.assertIsNotNone(store.issue(self.PHONE))
+                self.assertIsNone(store.issue(self.PHONE))
+
+    def test_single_use(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                code = store.issue(self.PHONE)
+                self.assertEqual(store.verify(self.PHONE, code), OTP_OK)
+                self.assertEqual(store.verify(self.PHONE, code), OTP_EXPIRED)
+
+    def test_bad_code(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                code = store.issue(self.PHONE)
+                self.assertEqual(store.verify("237600000002", code), OTP_EXPIRED)
+                self.assertEqual(store.verify(self.PHONE, "abcdef"), OTP_INVALID)
+                # not ASCII: compare_digest would raise on str
+                self.assertEqual(store.verify(self.PHONE, "12345é"), OTP_INVALID)
+                self.assertEqual(store.verify(self.PHONE, code), OTP_OK)
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_lockout(self):
+        store = CacheOTPStore()
+        code = store.issue(self.PHONE)
+        self.assertEqual(store.verify(self.PHONE, "abcdef"), OTP_INVALID)
+        self.assertEqual(store.verify(self.PHONE, "abcdef"), OTP_INVALID)
+        self.assertEqual(store.verify(self.PHONE, "abcdef"), OTP_LOCKED)
+        self.assertEqual(store.verify(self.PHONE, code), OTP_EXPIRED)
+
+    @override_settings(OTP_STORE="db")
+    def test_verify_view_rejects_a_non_ascii_code(self):
+        DBOTPStore().issue(self.PHONE)
+        response = APIClient().post("/api/auth/verify-otp/", {"phone": self.PHONE, "code": "12345é"}, format="json")
+        self.assertEqual(response.status_code, 400, response.content)
+
+
+class SlowQueryLogTests(TestCase):
+    """The slow-query log keeps statement shapes and parameter types, never the values."""
+
+    def test_parameters_are_not_stored(self):
+        from api.models import SlowQuery
+        from api.services.slow_queries import record
+
+        otp = 'DELETE FROM "api_otp" WHERE ("api_otp"."otp" = %s AND "api_otp"."id" = %s)'
+        user = 'SELECT "api_user"."id" FROM "api_user" WHERE "api_user"."phone_number" = %s'
+        record("verify_otp_view", [("default", otp, ("482913", 2), False, 150.0)])
+        record("list_users", [("default", user, ("237699887766",), False, 150.0)])
+
+        otp_row, user_row = SlowQuery.objects.filter(view__in=("verify_otp_view", "list_users")).order_by("id")
+        self.assertNotIn("482913", otp_row.sample)
+        self.assertIn("('str', 'int')", otp_row.sample)
+        self.assertEqual(otp_row.explain, "")
+        self.assertNotIn("237699887766", user_row.sample + user_row.explain)
+        self.assertTrue(user_row.explain)
+
+
+@override_settings(REPLICA_DATABASE="")  # plans are checked on default
+class QueryPlanTests(TestCase):
+    """The list / stats endpoints must read the hot tables through an index.
+
+    Each test calls a view with a filter, then EXPLAINs every SELECT it ran and fails
+    on a full scan of one of HOT_TABLES.
+    """
+    HOT_TABLES = {
+        "api_collecte", "api_payment", "api_subscription", "api_notification",
+        "api_schedule", "api_scheduleslot", "api_user",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.admin = User.objects.create_user("600000000", role="ADMIN")
+        cls.bouncer = User.objects.create_user("600000001", role="BOUNCER")
+        clients = User.objects.bulk_create(
+            [User(phone_number=f"6100{i:05d}", role="USER", city="Douala" if i % 2 else "Yaounde") for i in range(200)]
+        )
+        subs = Subscription.objects.bulk_create([
+            Subscription(client=c, plan="PRO" if i % 3 else "FREE", city=c.city, started_at=now - timedelta(days=i))
+            for i, c in enumerate(clients)
+        ])
+        schedules = Schedule.objects.bulk_create([
+            Schedule(subscription=s, videur=cls.bouncer if i % 4 == 0 else None, slots=[{"day": "Monday", "time": "08:00"}])
+            for i, s in enumerate(subs)
+        ])
+        ScheduleSlot.objects.bulk_create([ScheduleSlot(schedule=s, day=1 + i % 7, minutes=480) for i, s in enumerate(schedules)])
+        Collecte.objects.bulk_create([
+            Collecte(
+                client=s.client, subscription=s, videur=cls.bouncer if k % 2 else None,
+                date=now - timedelta(days=k), status="completed" if k % 3 else "scheduled",
+            )
+            for s in subs for k in range(5)
+        ])
+        Payment.objects.bulk_create([
+            Payment(
+                client=s.client, subscription=s, plan=s.plan, amount=1000,
+                status="success" if k % 2 else "pending", paid_at=now - timedelta(days=k) if k % 2 else None,
+            )
+            for s in subs for k in range(5)
+        ])
+        DailyStat.objects.bulk_create([
+            DailyStat(date=(now - timedelta(days=d)).date(), plan="PRO", currency="XAF", revenue=1000, payments_count=1)
+            for d in range(100)
+        ])
+        Notification.objects.bulk_create([
+            Notification(user=c, title="Collecte", message="Demain", type="INFO", is_read=bool(k % 2))
+            for c in clients for k in range(3)
+        ])
+        cls.client_user = clients[7]
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # tiny tables: make the planner show which index it would use
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(user).access_token))
+        return client
+
+    def assertIndexed(self, user, url, params=None, ordered=False):
+        """Fail on a full scan of a hot table; with ``ordered``, also on a sort (the page
+        must be read in index order)."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api(user).get(url, params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith(("SELECT", "WITH"))]
+        self.assertTrue(selects)
+        for sql in selects:
+            plan = explain(sql)
+            scanned = self.HOT_TABLES.intersection(full_scans(plan, sql))
+            self.assertFalse(scanned, f"full scan of {scanned} in {url} {params}:\n{sql}\n" + "\n".join(plan))
+            if ordered:
+                self.assertFalse(sorts(plan), f"sort in {url} {params}:\n{sql}\n" + "\n".join(plan))
+        return ctx.captured_queries
+
+    # list_collectes
+    def test_collectes_newest_first(self):
+        self.assertIndexed(self.admin, "/api/collectes/")
+
+    def test_collectes_of_client(self):
+        self.assertIndexed(self.client_user, "/api/collectes/")
+
+    def test_collectes_by_client_and_date(self):
+        since = (timezone.now() - timedelta(days=2)).isoformat()
+        self.assertIndexed(self.admin, "/api/collectes/", {"client": self.client_user.id, "date_from": since})
+
+    def test_collectes_by_videur_status_and_date(self):
+        since = (timezone.now() - timedelta(days=2)).isoformat()
+        self.assertIndexed(self.bouncer, "/api/collectes/", {"videur": self.bouncer.id, "status": "completed", "date_from": since})
+
+    # list_users
+    def test_users_newest_first(self):
+        self.assertIndexed(self.admin, "/api/users/")
+
+    # list_payments
+    def test_payments_by_client(self):
+        self.assertIndexed(self.admin, "/api/payments/", {"client": self.client_user.id})
+
+    def test_payments_by_status(self):
+        self.assertIndexed(self.admin, "/api/payments/", {"status": "SUCCESS"})
+
+    def test_payments_by_subscription(self):
+        self.assertIndexed(self.admin, "/api/payments/", {"subscription": self.client_user.subscription.id})
+
+    # list_subscriptions
+    def test_subscriptions_newest_first(self):
+        self.assertIndexed(self.admin, "/api/subscriptions/")
+
+    def test_subscriptions_by_client(self):
+        self.assertIndexed(self.admin, "/api/subscriptions/", {"client": self.client_user.id})
+
+    # list_schedules
+    def test_schedules_by_videur(self):
+        self.assertIndexed(self.admin, "/api/schedules/", {"videur": self.bouncer.id})
+
+    def test_schedules_by_day_and_time(self):
+        self.assertIndexed(self.admin, "/api/schedules/", {"day": "Monday", "time_from": "07:00", "time_to": "09:00"})
+
+    def test_schedules_of_client(self):
+        self.assertIndexed(self.client_user, "/api/schedules/")
+
+    # inbox
+    def test_notifications_inbox(self):
+        self.assertIndexed(self.client_user, "/api/notifications/", ordered=True)
+
+    def test_notifications_unread(self):
+        self.assertIndexed(self.client_user, "/api/notifications/", {"unread": 1}, ordered=True)
+
+    # stats: read the DailyStat rollup, never the payment / subscription tables
+    def test_stats_use_rollup(self):
+        for url in ("/api/stats/revenues/", "/api/stats/subscriptions/"):
+            queries = self.assertIndexed(self.admin, url, {"date_from": "2026-01-01"})
+            for query in queries:
+                # the authentication query joins the user's subscription: check what is read FROM
+                self.assertNotRegex(query["sql"], r'FROM "api_(payment|subscription)"')
+
+
+class NotificationInboxTests(TestCase):
+    """The unread counter follows creates, broadcasts, mark-read and deletes; the badge never counts rows."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user("600000000", role="ADMIN")
+        self.user = User.objects.create_user("600000001", role="USER")
+        Subscription.objects.create(client=self.user, city="Douala")
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(user).access_token))
+        return client
+
+    def unread(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.api(self.user).get("/api/notifications/unread-count/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+        return response.json()["unread"]
+
+    def test_counter(self):
+        first = Notification.objects.create(user=self.user, title="Bienvenue", message="Bienvenue", type="SUCCESS")
+        # outbox copy: not in the inbox
+        Notification.objects.create(user=self.user, title="Bienvenue", message="Bienvenue", type="SUCCESS", channel="WHATSAPP")
+        self.assertEqual(self.unread(), 1)
+
+        response = self.api(self.admin).post(
+            "/api/notifications/broadcast/",
+            {"title": "Annonce", "message": "Samedi", "channels": ["IN_APP", "WHATSAPP"], "filters": {"city": "Douala"}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.unread(), 2)
+        self.assertEqual(len(self.api(self.user).get("/api/notifications/", {"unread": 1}).json()["results"]), 2)
+
+        response = self.api(self.user).post("/api/notifications/read/", {"ids": [first.id]}, format="json")
+        self.assertEqual(response.json(), {"marked": 1, "unread": 1})
+        response = self.api(self.user).post("/api/notifications/read/", {"ids": [first.id]}, format="json")
+        self.assertEqual(response.json(), {"marked": 0, "unread": 1})
+
+        Notification.objects.create(user=self.user, title="Rappel", message="Rappel", type="INFO").delete()
+        self.assertEqual(self.unread(), 1)
+        response = self.api(self.user).post("/api/notifications/read/", {"all": True}, format="json")
+        self.assertEqual(response.json(), {"marked": 1, "unread": 0})
+        self.assertEqual(len(self.api(self.user).get("/api/notifications/").json()["results"]), 2)
+
+
+class CollecteSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bouncer = User.objects.create_user("600000001", role="BOUNCER")
+        self.client_user = User.objects.create_user("600000002", role="USER")
+        self.subscription = Subscription.objects.create(client=self.client_user, city="Douala")
+
+    def test_concurrent_create_of_the_same_sync_id_reports_exists(self):
+        from api.services import collecte_sync
+
+        sync_id = "4f1c1c9e-8a55-4c55-9d0e-2f7a0c3b1e01"
+        real_apply = collecte_sync._apply
+
+        def lose_the_race_once(user, items):
+            if not Collecte.objects.filter(sync_id=sync_id).exists():
+                # the device's first, timed-out request commits the row first
+                Collecte.objects.create(
+                    client=self.client_user, videur=self.bouncer, subscription=self.subscription,
+                    sync_id=sync_id, date=timezone.now(),
+                )
+                raise IntegrityError("UNIQUE constraint failed: api_collecte.sync_id")
+            return real_apply(user, items)
+
+        operations = [{"op": "create", "sync_id": sync_id, "client": self.client_user.id, "status": "completed"}]
+        with mock.patch.object(collecte_sync, "_apply", side_effect=lose_the_race_once):
+            results = collecte_sync.apply_collecte_sync(self.bouncer, operations)
+        self.assertEqual([r["result"] for r in results], ["exists"])
+        self.assertEqual(Collecte.objects.filter(sync_id=sync_id).count(), 1)
+
+    def test_reusing_a_planned_row_of_another_bouncer_tombstones_it(self):
+        from api.models import Tombstone
+        from api.services.collecte_sync import apply_collecte_sync
+
+        planner = User.objects.create_user("600000003", role="BOUNCER")
+        planned = Collecte.objects.create(
+            client=self.client_user, videur=planner, subscription=self.subscription,
+            status="scheduled", date=timezone.now(), planned_at=timezone.now(),
+        )
+        operations = [{"op": "create", "sync_id": "4f1c1c9e-8a55-4c55-9d0e-2f7a0c3b1e03", "client": self.client_user.id}]
+        results = apply_collecte_sync(self.bouncer, operations)
+        self.assertEqual([(r["result"], r["id"]) for r in results], [("created", planned.id)])
+        self.assertTrue(Tombstone.objects.filter(model="collecte", object_id=planned.id, videur_id=planner.id).exists())
+
+    def test_other_integrity_errors_are_raised(self):
+        from api.services import collecte_sync
+
+        operations = [{"op": "create", "sync_id": "4f1c1c9e-8a55-4c55-9d0e-2f7a0c3b1e02", "client": self.client_user.id}]
+        with mock.patch.object(collecte_sync, "_apply", side_effect=IntegrityError("NOT NULL")):
+            with self.assertRaises(IntegrityError):
+                collecte_sync.apply_collecte_sync(self.bouncer, operations)
+
+
+class ChangesFeedTests(TestCase):
+    """changes/ sends the rows created, updated and deleted after ``since`` exactly once
+    per watermark, including across truncated pages."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("600000001", role="USER")
+        self.subscription = Subscription.objects.create(client=self.user, city="Douala")
+        self.collecte = Collecte.objects.create(client=self.user, subscription=self.subscription, date=timezone.now())
+        self.notification = Notification.objects.create(user=self.user, title="Collecte", message="Demain", type="INFO")
+        # synced long ago
+        self.synced_at = timezone.now() - timedelta(hours=1)
+        for model in (Subscription, Collecte, Notification):
+            model.objects.update(updated_at=self.synced_at - timedelta(minutes=1))
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(user).access_token))
+        return client
+
+    def changes(self, since=None, user=None):
+        response = self.api(user or self.user).get("/api/changes/", {"since": since.isoformat()} if since else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def ids(self, rows):
+        return sorted(row["id"] for row in rows)
+
+    def test_full_sync(self):
+        data = self.changes()
+        self.assertTrue(data["full"])
+        self.assertEqual(self.ids(data["collectes"]), [self.collecte.id])
+        self.assertEqual(self.ids(data["subscriptions"]), [self.subscription.id])
+        self.assertEqual(self.ids(data["notifications"]), [self.notification.id])
+
+    def test_created_updated_and_deleted_rows(self):
+        created = Collecte.objects.create(client=self.user, subscription=self.subscription, date=timezone.now())
+        self.collecte.status = "completed"
+        self.collecte.save()
+        notification_id = self.notification.id
+        self.notification.delete()
+
+        data = self.changes(self.synced_at)
+        self.assertFalse(data["full"])
+        self.assertEqual(self.ids(data["collectes"]), sorted([self.collecte.id, created.id]))
+        self.assertEqual(data["subscriptions"], [])
+        self.assertEqual(data["notifications"], [])
+        self.assertEqual(data["deleted"], [{"model": "notification", "id": notification_id}])
+
+    def test_reassigned_rows_are_tombstoned_for_the_previous_bouncer(self):
+        first, second = (User.objects.create_user(f"60000001{k}", role="BOUNCER") for k in range(2))
+        admin = User.objects.create_user("600000019", role="ADMIN")
+        schedule = Schedule.objects.create(subscription=self.subscription, videur=first, slots=[])
+        Collecte.objects.filter(pk=self.collecte.pk).update(videur=first)
+        Schedule.objects.filter(pk=schedule.pk).update(updated_at=self.synced_at - timedelta(minutes=1))
+
+        collecte = Collecte.objects.get(pk=self.collecte.pk)
+        collecte.videur = second
+        collecte.save()
+        schedule = Schedule.objects.get(pk=schedule.pk)
+        schedule.videur = second
+        schedule.save()
+
+        gone = [{"model": "collecte", "id": collecte.id}, {"model": "schedule", "id": schedule.id}]
+        self.assertCountEqual(self.changes(self.synced_at, first)["deleted"], gone)
+        data = self.changes(self.synced_at, second)
+        self.assertEqual(self.ids(data["collectes"]), [collecte.id])
+        self.assertEqual(data["deleted"], [])
+        # still visible to the client and the admins
+        self.assertEqual(self.changes(self.synced_at)["deleted"], [])
+        self.assertEqual(self.changes(self.synced_at, admin)["deleted"], [])
+
+        collecte.videur = first
+        collecte.save()
+        data = self.changes(self.synced_at, first)
+        self.assertEqual(self.ids(data["collectes"]), [collecte.id])
+        self.assertEqual(data["deleted"], [{"model": "schedule", "id": schedule.id}])
+
+    def test_subscription_moved_to_another_client_is_tombstoned(self):
+        schedule = Schedule.objects.create(subscription=self.subscription, slots=[])
+        other = User.objects.create_user("600000003", role="USER")
+        self.subscription.refresh_from_db()
+        self.subscription.client = other
+        self.subscription.save()
+
+        self.assertCountEqual(
+            self.changes(self.synced_at)["deleted"],
+            [{"model": "subscription", "id": self.subscription.id}, {"model": "schedule", "id": schedule.id}],
+        )
+        self.assertEqual(self.changes(self.synced_at, other)["deleted"], [])
+
+    def test_row_at_the_watermark_is_not_sent_again(self):
+        Collecte.objects.filter(pk=self.collecte.pk).update(updated_at=self.synced_at)
+        self.assertEqual(self.changes(self.synced_at)["collectes"], [])
+        Collecte.objects.filter(pk=self.collecte.pk).update(updated_at=self.synced_at + timedelta(microseconds=1))
+        self.assertEqual(self.ids(self.changes(self.synced_at)["collectes"]), [self.collecte.id])
+
+    def test_truncated_page_keeps_rows_sharing_the_last_timestamp(self):
+        from api.services.changes import changes_since
+
+        t = [self.synced_at + timedelta(seconds=s) for s in (1, 2, 3, 3, 4)]
+        notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, title="Collecte", message=str(k), type="INFO") for k in range(len(t))
+        ])
+        for notification, updated_at in zip(notifications, t):
+            Notification.objects.filter(pk=notification.pk).update(updated_at=updated_at)
+
+        first = changes_since(self.user, self.synced_at, limit=3)
+        self.assertTrue(first["has_more"])
+        self.assertEqual(self.ids(first["notifications"]), [n.id for n in notifications[:4]])
+        self.assertEqual(first["watermark"], t[3].isoformat())
+
+        second = changes_since(self.user, t[3], limit=3)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(self.ids(second["notifications"]), [notifications[4].id])
+
+
+@skipUnless(
+    settings.REPLICA_DATABASE in settings.DATABASES,
+    "set DATABASE_REPLICA_NAME (e.g. a second SQLite file) to test replica routing",
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """@use_replica views read from the replica, other views and recent writers from default.
+
+    The replica alias mirrors the default test database, so only the routing is checked
+    (a TransactionTestCase: the replica connection only sees committed rows).
+    """
+    databases = set(settings.DATABASES)
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user("600000000", role="ADMIN")
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer " + str(RefreshToken.for_user(user).access_token))
+        return client
+
+    def get(self, url):
+        replica = connections[settings.REPLICA_DATABASE]
+        with CaptureQueriesContext(replica) as on_replica, CaptureQueriesContext(connection) as on_default:
+            response = self.api(self.admin).get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return on_replica.captured_queries, on_default.captured_queries
+
+    def test_dashboard_reads_use_replica(self):
+        for url in ("/api/payments/", "/api/users/", "/api/stats/revenues/"):
+            on_replica, on_default = self.get(url)
+            self.assertTrue(on_replica, url)
+            self.assertFalse([q for q in on_default if "api_payment" in q["sql"] or "api_dailystat" in q["sql"]], url)
+
+    def test_field_views_use_default(self):
+        on_replica, _ = self.get("/api/collectes/")
+        self.assertFalse(on_replica)
+
+    def test_reads_stick_to_default_after_a_write(self):
+        response = self.api(self.admin).put("/api/user/me/update/", {"name": "Admin"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        on_replica, _ = self.get("/api/payments/")
+        self.assertFalse(on_replica)
@@ -1,37 +1,59 @@
 from django.urls import path
-from api.views.auth.auth_views import change_subscription_plan, check_subscription_status, delete_subscription, get_church_subscription, renew_subscription, send_otp_view, toggle_subscription_status, update_subscription, verify_otp_view
-from api.views.crud.crud_views import delete_self, get_current_user, stats_revenues, stats_subscriptions, update_self, create_schedule, get_schedule, update_schedule, delete_schedule, list_schedules, list_users, list_payments, list_subscriptions
-from api.views.crud.collecte_views import create_collecte, get_collecte, update_collecte, delete_collecte, list_collectes
+from api.views.auth.auth_views import change_subscription_plan, check_subscription_status, delete_subscription, get_church_subscription, list_subscription_payments, renew_subscription, send_otp_view, toggle_subscription_status, update_subscription, verify_otp_view
+from api.views.crud.crud_views import delete_self, get_current_user, stats_revenues, stats_subscriptions, update_self, create_schedule, get_schedule, update_schedule, delete_schedule, list_schedules, list_users, list_payments, list_subscriptions, nearby_subscriptions
+from api.views.crud.collecte_views import create_collecte, get_collecte, update_collecte, delete_collecte, list_collectes, sync_collectes
+from api.views.crud.notification_views import create_broadcast, get_broadcast, get_unread_count, list_notifications, mark_notifications_read
+from api.views.crud.tour_views import get_tour
+from api.views.crud.sync_views import list_changes
+from api.views.crud.profiling_views import download_profile, get_profile, list_profiles
+from api.views.crud.slow_query_views import list_slow_queries
 urlpatterns = [
-    path("auth/send-otp/", send_otp_view),
-    path("auth/verify-otp/", verify_otp_view),
-    path("user/me/update/", update_self),
-    path("user/me/delete/", delete_self),
-    path("user/me/",get_current_user ),
-    path("subscription/", get_church_subscription),
-    path("subscription/update/", update_subscription),
-    path("subscription/delete/", delete_subscription),
-    path("subscription/status/", check_subscription_status),
-    path("subscription/change-plan/", change_subscription_plan),
-    path("subscription/toggle/", toggle_subscription_status),
-    path("subscription/renew/", renew_subscription),
+    path("auth/send-otp/", send_otp_view, name="send_otp_view"),
+    path("auth/verify-otp/", verify_otp_view, name="verify_otp_view"),
+    path("user/me/update/", update_self, name="update_self"),
+    path("user/me/delete/", delete_self, name="delete_self"),
+    path("user/me/", get_current_user, name="get_current_user"),
+    path("subscription/", get_church_subscription, name="get_church_subscription"),
+    path("subscription/update/", update_subscription, name="update_subscription"),
+    path("subscription/delete/", delete_subscription, name="delete_subscription"),
+    path("subscription/status/", check_subscription_status, name="check_subscription_status"),
+    path("subscription/change-plan/", change_subscription_plan, name="change_subscription_plan"),
+    path("subscription/toggle/", toggle_subscription_status, name="toggle_subscription_status"),
+    path("subscription/renew/", renew_subscription, name="renew_subscription"),
+    path("subscription/payments/", list_subscription_payments, name="list_subscription_payments"),
     # Schedule endpoints
-    path("schedule/", get_schedule),
-    path("schedule/create/", create_schedule),
-    path("schedule/update/", update_schedule),
-    path("schedule/delete/", delete_schedule),
-    path("schedules/", list_schedules),
+    path("schedule/", get_schedule, name="get_schedule"),
+    path("schedule/create/", create_schedule, name="create_schedule"),
+    path("schedule/update/", update_schedule, name="update_schedule"),
+    path("schedule/delete/", delete_schedule, name="delete_schedule"),
+    path("schedules/", list_schedules, name="list_schedules"),
     # Collecte endpoints
-    path("collecte/create/", create_collecte),
-    path("collecte/<int:collecte_id>/", get_collecte),
-    path("collecte/<int:collecte_id>/update/", update_collecte),
-    path("collecte/<int:collecte_id>/delete/", delete_collecte),
-    path("collectes/", list_collectes),
+    path("collecte/create/", create_collecte, name="create_collecte"),
+    path("collecte/<int:collecte_id>/", get_collecte, name="get_collecte"),
+    path("collecte/<int:collecte_id>/update/", update_collecte, name="update_collecte"),
+    path("collecte/<int:collecte_id>/delete/", delete_collecte, name="delete_collecte"),
+    path("collectes/", list_collectes, name="list_collectes"),
+    path("collectes/sync/", sync_collectes, name="sync_collectes"),
+    path("tour/", get_tour, name="get_tour"),
+    # Delta sync for the mobile apps
+    path("changes/", list_changes, name="list_changes"),
+    # Notification endpoints
+    path("notifications/", list_notifications, name="list_notifications"),
+    path("notifications/read/", mark_notifications_read, name="mark_notifications_read"),
+    path("notifications/unread-count/", get_unread_count, name="get_unread_count"),
+    path("notifications/broadcast/", create_broadcast, name="create_broadcast"),
+    path("notifications/broadcast/<int:broadcast_id>/", get_broadcast, name="get_broadcast"),
     # Admin / dashboard endpoints
-    path("users/", list_users),
-    path("payments/", list_payments),
-    path("subscriptions/", list_subscriptions),
+    path("users/", list_users, name="list_users"),
+    path("payments/", list_payments, name="list_payments"),
+    path("subscriptions/", list_subscriptions, name="list_subscriptions"),
+    path("subscriptions/nearby/", nearby_subscriptions, name="nearby_subscriptions"),
     # Stats
-    path("stats/revenues/", stats_revenues),
-    path("stats/subscriptions/", stats_subscriptions),
+    path("stats/revenues/", stats_revenues, name="stats_revenues"),
+    path("stats/subscriptions/", stats_subscriptions, name="stats_subscriptions"),
+    # Diagnostics (SADMIN)
+    path("profiles/", list_profiles, name="list_profiles"),
+    path("profiles/<str:profile_id>/", get_profile, name="get_profile"),
+    path("profiles/<str:profile_id>/download/", download_profile, name="download_profile"),
+    path("slow-queries/", list_slow_queries, name="list_slow_queries"),
 ]
@@ -3,14 +3,17 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
-from api.models import Subscription, User, OTP, Notification, Payment
-from api.serializers import  SubscriptionSerializer, UserSerializer
-from api.services.whatsapp import send_otp_whatsapp
+from api.models import Subscription, User, Notification, Payment
+from api.serializers import  PaymentSerializer, SubscriptionSerializer, UserSerializer
+from api.pagination import paginate
+from api.services.whatsapp import send_otp_whatsapp, verify_otp
 from api.permissions import IsAuthenticatedUser, IsSuperAdmin
+from api.conditional import conditional, subscription_status_version, subscription_version
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from api.services.notify import create_and_send_whatsapp_notification
 
@@ -39,15 +42,11 @@ def verify_otp_view(request):
     if not phone or not code:
         return Response({"error": "phone et code obligatoires"}, status=400)
 
-    # 1. Vérification OTP
-    try:
-        otp_obj = OTP.objects.get(phone=phone, otp=code)
-    except OTP.DoesNotExist:
-        return Response({"error": "OTP incorrect"}, status=400)
+    # 1. Vérification OTP (consumed on success)
+    result = verify_otp(phone, code)
+    if result.get("status") == "error":
+        return Response({"error": result["message"]}, status=400)
 
-    if otp_obj.is_expired():
-        return Response({"error": "OTP expiré"}, status=400)
-    
 
     # 2. Récupérer / créer l'utilisateur
     user, created = User.objects.get_or_create(
@@ -74,10 +73,7 @@ def verify_otp_view(request):
     # 3. Générer le token JWT (access + refresh)
     refresh = RefreshToken.for_user(user)
 
-    # 4. Supprimer l'OTP après succès
-    otp_obj.delete()
-
-    # 5. Retour
+    # 4. Retour
     message = "Nouveau compte créé" if created else "Utilisateur existant connecté"
 
     return Response({
@@ -92,13 +88,31 @@ def verify_otp_view(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@conditional(subscription_version)
 def get_church_subscription(request):
     user = request.user
-    sub = get_object_or_404(Subscription, client=user)
+    sub = get_object_or_404(Subscription.objects.with_payment_history(), client=user)
     if not sub:
         return Response({"detail": "No subscription"}, status=404)
     return Response(SubscriptionSerializer(sub).data)
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def list_subscription_payments(request):
+    """Full payment history of a subscription, newest first, paginated with ?cursor=&page_size=.
+    Clients get their own; admins may pass ?subscription=<id>.
+    """
+    user = request.user
+    sub_id = request.GET.get("subscription")
+    if sub_id and user.role in ("SADMIN", "ADMIN"):
+        sub = get_object_or_404(Subscription, pk=sub_id)
+    else:
+        sub = getattr(user, "subscription", None)
+        if not sub:
+            return Response({"detail": "No subscription"}, status=404)
+
+    return paginate(request, sub.payments.all(), PaymentSerializer, ordering=('-created_at', '-id'))
+
 @api_view(["PUT", "PATCH"])
 @permission_classes([IsAuthenticatedUser])
 def update_subscription(request):
@@ -160,6 +174,7 @@ def delete_subscription(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@conditional(subscription_status_version)
 def check_subscription_status(request):
 
     user = request.user
@@ -186,20 +201,21 @@ def change_subscription_plan(request):
         return Response({"error": "Invalid plan"}, status=400)
 
     user = request.user
-    sub = getattr(user, "subscription", None)
-
-    if not sub:
-        sub = Subscription.objects.create(
-            client=user,
-            plan=plan,
-            expires_at=timezone.now() + timedelta(days=30)
-        )
-        created = True
-    else:
-        sub.plan = plan
-        sub.expires_at = timezone.now() + timedelta(days=30)
-        sub.save()
-        created = False
+    # request.user.subscription may be a cached copy: lock and update the stored row
+    with transaction.atomic():
+        sub = Subscription.objects.select_for_update().filter(client=user).first()
+        if not sub:
+            sub = Subscription.objects.create(
+                client=user,
+                plan=plan,
+                expires_at=timezone.now() + timedelta(days=30)
+            )
+            created = True
+        else:
+            sub.plan = plan
+            sub.expires_at = timezone.now() + timedelta(days=30)
+            sub.save(update_fields=["plan", "expires_at", "updated_at"])
+            created = False
 
     # create a payment whenever plan is changed/created
     try:
@@ -227,28 +243,32 @@ def change_subscription_plan(request):
 @permission_classes([IsAuthenticatedUser])
 def toggle_subscription_status(request):
     user = request.user
-    sub = getattr(user, "subscription", None)
-    sub.is_active = not sub.is_active
-    sub.save()
+    with transaction.atomic():
+        sub = Subscription.objects.select_for_update().filter(client=user).first()
+        if not sub:
+            return Response({"detail": "No subscription"}, status=404)
+        sub.is_active = not sub.is_active
+        sub.save(update_fields=["is_active", "updated_at"])
     return Response({"active": sub.is_active})
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticatedUser])
 def renew_subscription(request):
     user = request.user
-    sub = getattr(user, "subscription", None)
     months = int(request.data.get("months", 1))
-    # extend expiry date
-    if not sub:
-        sub = Subscription.objects.create(client=user)
-
-    if sub.expires_at:
-        sub.expires_at += timedelta(days=30 * months)
-    else:
-        sub.expires_at = timezone.now() + timedelta(days=30 * months)
-    sub.is_active = True
-
-    sub.save()
+    # extend the stored expiry date (request.user.subscription may be a cached copy)
+    with transaction.atomic():
+        sub = Subscription.objects.select_for_update().filter(client=user).first()
+        if not sub:
+            sub = Subscription.objects.create(client=user)
+
+        if sub.expires_at:
+            sub.expires_at += timedelta(days=30 * months)
+        else:
+            sub.expires_at = timezone.now() + timedelta(days=30 * months)
+        sub.is_active = True
+
+        sub.save(update_fields=["expires_at", "is_active", "updated_at"])
 
     # create a payment for the renewal (amount = price * months)
     try:
@@ -5,8 +5,13 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import datetime
 from api.permissions import IsAuthenticatedUser
+from api.conditional import collecte_version, conditional
 from api.models import Collecte, Subscription, User
-from api.serializers import CollecteSerializer
+from api.serializers import CollecteSerializer, CollecteListSerializer
+from api.pagination import paginate
+from api.services.planning import find_planned_collecte
+from api.services.collecte_sync import apply_collecte_sync
+from django.conf import settings
 
 
 @api_view(["POST"])
@@ -39,8 +44,23 @@ def create_collecte(request):
     
     data["subscription_id"] = client.subscription.id
     # Don't set client/videur in data since they're read-only, pass them to save() instead
-    
-    serializer = CollecteSerializer(data=data)
+
+    # reuse the row materialized from the schedule for that day, if any
+    day = timezone.localdate()
+    if data.get("date"):
+        try:
+            dt = datetime.fromisoformat(str(data["date"]).replace('Z', '+00:00'))
+            day = timezone.localdate(dt) if timezone.is_aware(dt) else dt.date()
+        except ValueError:
+            pass  # the serializer reports the invalid date
+    planned = find_planned_collecte(client.subscription, day)
+
+    if planned:
+        # planned_at keeps the slot; date records the pickup
+        data.setdefault("date", timezone.now())
+        serializer = CollecteSerializer(planned, data=data, partial=True)
+    else:
+        serializer = CollecteSerializer(data=data)
     if serializer.is_valid():
         # Pass client and videur to save() since they're read-only fields
         collecte = serializer.save(client=client, videur=user)
@@ -50,6 +70,7 @@ def create_collecte(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@conditional(collecte_version)
 def get_collecte(request, collecte_id):
     """Get a single collecte by id. Permission: videur/client/admin."""
     user = request.user
@@ -75,11 +96,12 @@ def get_collecte(request, collecte_id):
 @permission_classes([IsAuthenticatedUser])
 def list_collectes(request):
     """List collectes with filters: client, videur, status, waste_type, date_from, date_to.
-    Sorted descending by id.
+    Sorted descending by id, paginated with ?cursor=&page_size=.
     Permissions: bouncers see their own, admins see all, clients see their own.
     """
     user = request.user
-    qs = Collecte.objects.select_related('client', 'videur', 'subscription').all()
+    # flat list representation: one query per page, no nested payments
+    qs = Collecte.objects.select_related('client', 'videur', 'subscription').only(*CollecteListSerializer.LIST_FIELDS)
     
     is_privileged = user.role in ("SADMIN", "ADMIN", "BOUNCER")
     
@@ -122,10 +144,7 @@ def list_collectes(request):
         except Exception:
             return Response({"date_to": ["Invalid ISO datetime format"]}, status=400)
     
-    qs = qs.order_by('-id')
-    
-    serializer = CollecteSerializer(qs, many=True)
-    return Response(serializer.data)
+    return paginate(request, qs, CollecteListSerializer, ordering='-id')
 
 
 @api_view(["PUT", "PATCH"])
@@ -173,3 +192,23 @@ def delete_collecte(request, collecte_id):
     
     collecte.delete()
     return Response({"detail": "Collecte deleted"})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticatedUser])
+def sync_collectes(request):
+    """Apply a batch of offline operations: {"operations": [{"op": "create", "sync_id", "client", ...},
+    {"op": "update", "id" or "sync_id", ...}]}. Creates are bouncer-only and idempotent on sync_id;
+    updates follow update_collecte permissions. Returns one result per operation, in order.
+    """
+    operations = request.data.get("operations")
+    if not isinstance(operations, list):
+        return Response({"operations": ["Expected a list of operations"]}, status=400)
+    if len(operations) > settings.COLLECTE_SYNC_MAX_OPS:
+        return Response({"operations": [f"At most {settings.COLLECTE_SYNC_MAX_OPS} operations per request"]}, status=400)
+
+    results = apply_collecte_sync(request.user, operations)
+    summary = {"created": 0, "updated": 0, "exists": 0, "error": 0}
+    for result in results:
+        summary[result["result"]] += 1
+    return Response({"results": results, **summary})
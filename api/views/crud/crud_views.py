@@ -1,20 +1,25 @@
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.utils import timezone
 from rest_framework import status
-from django.db.models import Count
 from django.db.models import Q
-from django.db.models import Sum
+from django.db.models import Prefetch
 from api.permissions import IsAuthenticatedUser
+from api.conditional import conditional, current_user_version, schedule_version
+from api.db_router import use_replica
 from api.serializers import UserMeSerializer, UserSerializer, PaymentSerializer, SubscriptionSerializer
 from api.services.notify import create_and_send_whatsapp_notification
 from django.utils.text import slugify
 from django.db import transaction
-from api.models import Payment, Schedule, Subscription, User
+from api.models import Payment, Schedule, ScheduleSlot, Subscription, User
 from api.serializers import ScheduleSerializer
+from api.pagination import KeysetPagination, paginate
+from api.services.stats import revenue_stats, subscription_stats
+from api.services.geo import k_nearest, within_radius
+from django.conf import settings
+
+from datetime import date
 
-from datetime import datetime
 
 
 @api_view(["PUT", "PATCH"])
@@ -36,6 +41,7 @@ def delete_self(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@conditional(current_user_version)
 def get_current_user(request):
     serializer = UserMeSerializer(request.user)
     return Response(serializer.data)
@@ -89,6 +95,7 @@ def create_schedule(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@conditional(schedule_version)
 def get_schedule(request):
     user = request.user
     # admins/bouncers can request schedule for any subscription via ?subscription=<id>
@@ -118,7 +125,7 @@ def get_schedule(request):
 def list_schedules(request):
     """List schedules with optional filters:
     ?videur=<id>&city=<name>&day=<1..7 or name>&time_from=HH:MM&time_to=HH:MM&user=<client_id>
-    Returns schedules ordered descending by id.
+    Returns schedules ordered descending by id, paginated with ?cursor=&page_size=.
     """
     user = request.user
     qs = Schedule.objects.select_related('subscription', 'videur').all()
@@ -149,105 +156,51 @@ def list_schedules(request):
             # non privileged: restrict to request user's subscription only
             qs = qs.filter(subscription__client=user)
 
-    # preliminary order (descending by id)
-    qs = qs.order_by('-id')
-
-    # day/time filtering performed in Python because slots is JSONField list
-    def slot_matches(slot, wanted_day=None, t_from=None, t_to=None):
-        try:
-            s_day = slot.get('day')
-            s_time = slot.get('time')
-        except Exception:
-            return False
-        # normalize day (accept int as string too)
-        DAY_MAP = { '1':'Monday','2':'Tuesday','3':'Wednesday','4':'Thursday','5':'Friday','6':'Saturday','7':'Sunday' }
-        if wanted_day:
-            wanted = wanted_day
-            if isinstance(wanted, str) and wanted.isdigit():
-                wanted = DAY_MAP.get(wanted)
-            if isinstance(wanted, int):
-                wanted = DAY_MAP.get(str(wanted))
-            if not wanted:
-                wanted = wanted_day
-            if s_day != wanted:
-                return False
-        if t_from or t_to:
-            try:
-                st = datetime.strptime(s_time, '%H:%M').time()
-            except Exception:
-                return False
-            if t_from:
-                if st < t_from:
-                    return False
-            if t_to:
-                if st > t_to:
-                    return False
-        return True
-
-    # parse time bounds
-    t_from_obj = None
-    t_to_obj = None
+    # parse time bounds into minutes since midnight (ScheduleSlot.minutes)
     def parse_time_str(s, field_name):
-        if not s:
-            return None, None
         s = s.strip()
         # strip possible surrounding quotes
         if (s.startswith('"') and s.endswith('"')) or (s.startswith("'") and s.endswith("'")):
             s = s[1:-1].strip()
-        try:
-            return datetime.strptime(s, '%H:%M').time(), None
-        except Exception:
+        minutes = ScheduleSlot.parse_minutes(s)
+        if minutes is None:
             return None, {field_name: ["Invalid time format, use HH:MM (00:00-23:59)"]}
+        return minutes, None
 
+    slot_filter = {}
+    if day:
+        wanted_day = ScheduleSlot.day_number(day)
+        if wanted_day is None:
+            return Response({"day": ["Invalid day, use 1..7 or a weekday name"]}, status=400)
+        slot_filter['day'] = wanted_day
     if time_from:
-        t_from_obj, err = parse_time_str(time_from, 'time_from')
+        slot_filter['minutes__gte'], err = parse_time_str(time_from, 'time_from')
         if err:
             return Response(err, status=400)
     if time_to:
-        t_to_obj, err = parse_time_str(time_to, 'time_to')
+        slot_filter['minutes__lte'], err = parse_time_str(time_to, 'time_to')
         if err:
             return Response(err, status=400)
 
-    wanted_day = None
-    if day:
-        if day.isdigit():
-            DAY_MAP = { '1':'Monday','2':'Tuesday','3':'Wednesday','4':'Thursday','5':'Friday','6':'Saturday','7':'Sunday' }
-            wanted_day = DAY_MAP.get(day)
-            if not wanted_day:
-                return Response({"day": ["Invalid day integer, use 1..7"]}, status=400)
-        else:
-            wanted_day = day.strip().capitalize()
-
-    results = []
-    for sched in qs:
-        slots = sched.slots or []
-        if day or time_from or time_to:
-            matched = False
-            for slot in slots:
-                if slot_matches(slot, wanted_day=wanted_day, t_from=t_from_obj, t_to=t_to_obj):
-                    matched = True
-                    break
-            if not matched:
-                continue
-        results.append(sched)
-
-    serializer = ScheduleSerializer(results, many=True)
-    data = serializer.data
+    # day/time filters run in SQL on the (day, minutes) index of ScheduleSlot
+    matching_slots = None
+    if slot_filter:
+        matching_slots = ScheduleSlot.objects.filter(**slot_filter)
+        qs = qs.filter(pk__in=matching_slots.values('schedule_id')).prefetch_related(
+            Prefetch('slot_rows', queryset=matching_slots, to_attr='matching_slots')
+        )
+
+    paginator = KeysetPagination('-id')
+    page = paginator.paginate_queryset(qs, request)
+    data = ScheduleSerializer(page, many=True).data
 
     # if day/time filters were applied, trim returned slots to only matching ones
-    if day or time_from or time_to:
-        trimmed = []
-        for item, sched in zip(data, results):
-            filtered_slots = []
-            for slot in item.get('slots', []):
-                if slot_matches(slot, wanted_day=wanted_day, t_from=t_from_obj, t_to=t_to_obj):
-                    filtered_slots.append(slot)
-            if filtered_slots:
-                item['slots'] = filtered_slots
-                trimmed.append(item)
-        return Response(trimmed)
+    if matching_slots is not None:
+        for item, sched in zip(data, page):
+            keys = {(row.day, row.minutes) for row in sched.matching_slots}
+            item['slots'] = [slot for slot in item.get('slots', []) if ScheduleSlot.key(slot) in keys]
 
-    return Response(data)
+    return paginator.get_paginated_response(data)
 
 
 @api_view(["PUT", "PATCH"])
@@ -332,9 +285,10 @@ def delete_schedule(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@use_replica
 def list_users(request):
     """List users with optional filters: ?role=&city=&address=&subscription=PLAN
-    Results ordered descending by id.
+    Results ordered descending by id, paginated with ?cursor=&page_size=.
     """
     qs = User.objects.all()
     role = request.GET.get('role')
@@ -351,15 +305,14 @@ def list_users(request):
     if subscription_plan:
         qs = qs.filter(subscription__plan__iexact=subscription_plan)
 
-    qs = qs.order_by('-id')
-    serializer = UserSerializer(qs, many=True)
-    return Response(serializer.data)
+    return paginate(request, qs, UserSerializer, ordering='-id')
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@use_replica
 def list_payments(request):
-    """List payments with filters: ?client=&subscription=&status=&plan=. Ordered desc by created_at."""
+    """List payments with filters: ?client=&subscription=&status=&plan=. Ordered desc by created_at, paginated."""
     qs = Payment.objects.select_related('client', 'subscription').all()
     client_id = request.GET.get('client')
     sub_id = request.GET.get('subscription')
@@ -371,20 +324,20 @@ def list_payments(request):
     if sub_id:
         qs = qs.filter(subscription__id=sub_id)
     if status_val:
-        qs = qs.filter(status__iexact=status_val)
+        # statuses are stored lowercase: an exact match can use payment_status_paid_idx
+        qs = qs.filter(status=status_val.lower())
     if plan:
         qs = qs.filter(plan__iexact=plan)
 
-    qs = qs.order_by('-created_at')
-    serializer = PaymentSerializer(qs, many=True)
-    return Response(serializer.data)
+    return paginate(request, qs, PaymentSerializer, ordering=('-created_at', '-id'))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@use_replica
 def list_subscriptions(request):
-    """List subscriptions with optional filters: ?client=&plan=&city=. Ordered desc by started_at."""
-    qs = Subscription.objects.select_related('client').all()
+    """List subscriptions with optional filters: ?client=&plan=&city=. Ordered desc by started_at, paginated."""
+    qs = Subscription.objects.select_related('client').with_payment_history()
     client_id = request.GET.get('client')
     plan = request.GET.get('plan')
     city = request.GET.get('city')
@@ -396,65 +349,92 @@ def list_subscriptions(request):
     if city:
         qs = qs.filter(city__icontains=city)
 
-    qs = qs.order_by('-started_at')
-    serializer = SubscriptionSerializer(qs, many=True)
-    return Response(serializer.data)
+    return paginate(request, qs, SubscriptionSerializer, ordering=('-started_at', '-id'))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
-def stats_revenues(request):
-    """Return revenue totals: daily, monthly, yearly, total (only successful payments).
-    Restricted to ADMIN/SADMIN.
+def nearby_subscriptions(request):
+    """Subscriptions near a point: ?lat=&lon= with ?radius_km= (closest first, up to ?k=50)
+    or only ?k= (k nearest, default 10). Uses the Subscription.geo_cell grid index.
+    Restricted to ADMIN/SADMIN/BOUNCER.
     """
     user = request.user
-    if user.role not in ("SADMIN", "ADMIN"):
+    if user.role not in ("SADMIN", "ADMIN", "BOUNCER"):
         return Response({"detail": "Forbidden"}, status=403)
 
-    now = timezone.now()
-    # daily: paid_at date == today
-    daily_qs = Payment.objects.filter(status='success', paid_at__date=now.date())
-    monthly_qs = Payment.objects.filter(status='success', paid_at__year=now.year, paid_at__month=now.month)
-    yearly_qs = Payment.objects.filter(status='success', paid_at__year=now.year)
-    total_qs = Payment.objects.filter(status='success')
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+    except (KeyError, ValueError):
+        return Response({"lat": ["lat and lon are required numbers"]}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return Response({"lat": ["lat must be in -90..90 and lon in -180..180"]}, status=400)
+
+    radius = request.GET.get('radius_km')
+    try:
+        k = min(int(request.GET.get('k') or (50 if radius else 10)), 200)
+        radius = float(radius) if radius else None
+    except ValueError:
+        return Response({"k": ["k must be an integer and radius_km a number"]}, status=400)
+    if k < 1 or (radius is not None and not 0 < radius <= settings.GEO_MAX_RADIUS_KM):
+        return Response({"radius_km": [f"k must be >= 1 and radius_km in (0, {settings.GEO_MAX_RADIUS_KM}]"]}, status=400)
+
+    if radius is not None:
+        results = within_radius(lat, lon, radius, limit=k)
+    else:
+        results = k_nearest(lat, lon, k)
+    return Response(results)
 
-    daily_total = daily_qs.aggregate(total=Sum('amount'))['total'] or 0
-    monthly_total = monthly_qs.aggregate(total=Sum('amount'))['total'] or 0
-    yearly_total = yearly_qs.aggregate(total=Sum('amount'))['total'] or 0
-    total_all = total_qs.aggregate(total=Sum('amount'))['total'] or 0
 
-    return Response({
-        'daily': str(daily_total),
-        'monthly': str(monthly_total),
-        'yearly': str(yearly_total),
-        'total': str(total_all),
-        'currency': getattr(Payment.objects.first(), 'currency', 'XAF')
-    })
+def _stats_filters(request):
+    """Parse ?date_from=&date_to= (YYYY-MM-DD) and ?plan=&city=&currency= for the stats views."""
+    params = {}
+    for name in ('date_from', 'date_to'):
+        value = request.GET.get(name)
+        if value:
+            try:
+                params[name] = date.fromisoformat(value)
+            except ValueError:
+                return None, {name: ["Invalid ISO date format, use YYYY-MM-DD"]}
+    for name in ('plan', 'city', 'currency'):
+        value = request.GET.get(name)
+        if value:
+            params[f'{name}__iexact'] = value
+    return params, None
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedUser])
+@use_replica
+def stats_revenues(request):
+    """Return revenue totals: daily, monthly, yearly, total (only successful payments),
+    plus `range` when ?date_from=/?date_to= are given. Optional ?plan=&city=&currency=.
+    Read from the DailyStat rollups. Restricted to ADMIN/SADMIN.
+    """
+    user = request.user
+    if user.role not in ("SADMIN", "ADMIN"):
+        return Response({"detail": "Forbidden"}, status=403)
+
+    params, err = _stats_filters(request)
+    if err:
+        return Response(err, status=400)
+    return Response(revenue_stats(**params))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+@use_replica
 def stats_subscriptions(request):
-    """Return subscription counts: daily, monthly, yearly, total.
-    Restricted to ADMIN/SADMIN.
+    """Return subscription counts: daily, monthly, yearly, total and by_plan,
+    plus `range` when ?date_from=/?date_to= are given. Optional ?plan=&city=&currency=.
+    Read from the DailyStat rollups. Restricted to ADMIN/SADMIN.
     """
     user = request.user
-    if user.role in ("SADMIN", "ADMIN"):
+    if user.role not in ("SADMIN", "ADMIN"):
         return Response({"detail": "Forbidden"}, status=403)
 
-    now = timezone.now()
-    daily_count = Subscription.objects.filter(started_at__date=now.date()).count()
-    monthly_count = Subscription.objects.filter(started_at__year=now.year, started_at__month=now.month).count()
-    yearly_count = Subscription.objects.filter(started_at__year=now.year).count()
-    total_count = Subscription.objects.all().count()
-
-    # also provide breakdown by plan
-    by_plan = Subscription.objects.values('plan').annotate(count=Count('id')).order_by('-count')
-
-    return Response({
-        'daily': daily_count,
-        'monthly': monthly_count,
-        'yearly': yearly_count,
-        'total': total_count,
-        'by_plan': list(by_plan)
-    })
\ No newline at end of file
+    params, err = _stats_filters(request)
+    if err:
+        return Response(err, status=400)
+    return Response(subscription_stats(**params))
@@ -0,0 +1,78 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from api.pagination import paginate
+from api.permissions import IsAuthenticatedUser
+from api.models import Broadcast
+from api.serializers import BroadcastSerializer, NotificationSerializer
+from api.services.broadcast import broadcast_progress, run_broadcast
+from api.services.inbox import inbox, mark_read, unread_count
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticatedUser])
+def create_broadcast(request):
+    """Broadcast a notification to every client matching `filters` ({city, plan, videur})
+    on the given `channels` (IN_APP, WHATSAPP). Restricted to ADMIN/SADMIN.
+    Rows are written in chunks; WhatsApp delivery runs in the outbox worker.
+    """
+    user = request.user
+    if user.role not in ("SADMIN", "ADMIN"):
+        return Response({"detail": "Forbidden"}, status=403)
+
+    serializer = BroadcastSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+    broadcast = serializer.save(created_by=user)
+    run_broadcast(broadcast)
+
+    data = BroadcastSerializer(broadcast).data
+    data["progress"] = broadcast_progress(broadcast)
+    return Response(data, status=201)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def get_broadcast(request, broadcast_id):
+    """Broadcast with per-channel delivery progress. Restricted to ADMIN/SADMIN."""
+    user = request.user
+    if user.role not in ("SADMIN", "ADMIN"):
+        return Response({"detail": "Forbidden"}, status=403)
+
+    broadcast = get_object_or_404(Broadcast, pk=broadcast_id)
+    data = BroadcastSerializer(broadcast).data
+    data["progress"] = broadcast_progress(broadcast)
+    return Response(data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def list_notifications(request):
+    """In-app notifications of the current user, newest first: ?unread=1 for the unread ones.
+    Paginated with ?cursor=&page_size=.
+    """
+    qs = inbox(request.user)
+    if request.GET.get("unread") in ("1", "true"):
+        qs = qs.filter(is_read=False)
+    return paginate(request, qs, NotificationSerializer, ordering=("-created_at", "-id"))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticatedUser])
+def mark_notifications_read(request):
+    """Mark notifications read: {"ids": [...]} or {"all": true}. Returns the number
+    marked and the new unread count."""
+    ids = request.data.get("ids")
+    if request.data.get("all") is True:
+        ids = None
+    elif not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return Response({"ids": ["Provide a list of notification ids or all=true"]}, status=400)
+    marked = mark_read(request.user, ids)
+    return Response({"marked": marked, "unread": unread_count(request.user)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def get_unread_count(request):
+    """Inbox badge: {"unread": n}, read from the user's counter row."""
+    return Response({"unread": unread_count(request.user)})
@@ -0,0 +1,39 @@
+from django.http import FileResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from api.permissions import IsAuthenticatedUser
+from api.services.profiling import load_profile, profile_file, recent_profiles
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def list_profiles(request):
+    """Stored cProfile captures, newest first (see api.middleware.ProfilingMiddleware).
+    Restricted to SADMIN."""
+    if request.user.role != "SADMIN":
+        return Response({"detail": "Forbidden"}, status=403)
+    return Response(recent_profiles())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def get_profile(request, profile_id):
+    """Metadata and SQL log of a capture. Restricted to SADMIN."""
+    if request.user.role != "SADMIN":
+        return Response({"detail": "Forbidden"}, status=403)
+    meta = load_profile(profile_id)
+    if meta is None:
+        return Response({"detail": "Not found"}, status=404)
+    return Response(meta)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def download_profile(request, profile_id):
+    """pstats dump of a capture, to open with `python -m pstats` or snakeviz. Restricted to SADMIN."""
+    if request.user.role != "SADMIN":
+        return Response({"detail": "Forbidden"}, status=403)
+    path = profile_file(profile_id)
+    if path is None:
+        return Response({"detail": "Not found"}, status=404)
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name, content_type="application/octet-stream")
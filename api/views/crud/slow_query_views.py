@@ -0,0 +1,21 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from api.permissions import IsAuthenticatedUser
+from api.serializers import SlowQuerySerializer
+from api.services.slow_queries import ORDERINGS, slow_queries
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def list_slow_queries(request):
+    """Slow-query log by fingerprint: ?order=total|max|count|recent&limit=50. Restricted to SADMIN."""
+    if request.user.role != "SADMIN":
+        return Response({"detail": "Forbidden"}, status=403)
+    order = request.GET.get("order", "total")
+    if order not in ORDERINGS:
+        return Response({"order": [f"One of {', '.join(ORDERINGS)}"]}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", 50)), 1), 500)
+    except ValueError:
+        return Response({"limit": ["Must be an integer"]}, status=400)
+    return Response(SlowQuerySerializer(slow_queries(order, limit), many=True).data)
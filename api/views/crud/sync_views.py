@@ -0,0 +1,24 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from api.permissions import IsAuthenticatedUser
+from api.services.changes import changes_since
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def list_changes(request):
+    """Delta sync for the mobile apps: ?since=<watermark of the previous response>
+    Returns the collectes, schedules, subscriptions and notifications changed since then,
+    `deleted` tombstones and the next `watermark`. Without `since` (or when `full` is true)
+    the client replaces its local data; while `has_more` is true it calls again at once.
+    """
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return Response({"since": ["Invalid watermark"]}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+    return Response(changes_since(request.user, since))
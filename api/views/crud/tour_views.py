@@ -0,0 +1,56 @@
+from datetime import date
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django.utils import timezone
+from api.permissions import IsAuthenticatedUser
+from api.models import ScheduleSlot, User
+from api.services.routing import day_stops, plan_tour, tour_start
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedUser])
+def get_tour(request):
+    """Optimized visiting order of a videur's stops for a day:
+    ?videur=<id>&date=YYYY-MM-DD&start_time=HH:MM&start_lat=&start_lon=
+    Bouncers get their own tour (videur defaults to them); admins may pass any videur.
+    """
+    user = request.user
+    videur_id = request.GET.get('videur')
+    if user.role in ("SADMIN", "ADMIN"):
+        if not videur_id:
+            return Response({"videur": ["This field is required"]}, status=400)
+        try:
+            videur = User.objects.get(pk=videur_id, role="BOUNCER")
+        except (User.DoesNotExist, ValueError):
+            return Response({"videur": ["Bouncer not found"]}, status=404)
+    elif user.role == "BOUNCER":
+        if videur_id and str(user.id) != videur_id:
+            return Response({"detail": "Forbidden"}, status=403)
+        videur = user
+    else:
+        return Response({"detail": "Forbidden"}, status=403)
+
+    day = timezone.localdate()
+    if request.GET.get('date'):
+        try:
+            day = date.fromisoformat(request.GET['date'])
+        except ValueError:
+            return Response({"date": ["Invalid ISO date format, use YYYY-MM-DD"]}, status=400)
+
+    start_time = None
+    if request.GET.get('start_time'):
+        start_time = ScheduleSlot.parse_minutes(request.GET['start_time'])
+        if start_time is None:
+            return Response({"start_time": ["Invalid time format, use HH:MM (00:00-23:59)"]}, status=400)
+
+    origin = None
+    start_lat, start_lon = request.GET.get('start_lat'), request.GET.get('start_lon')
+    if start_lat or start_lon:
+        try:
+            origin = (float(start_lat), float(start_lon))
+        except (TypeError, ValueError):
+            return Response({"start_lat": ["start_lat and start_lon must both be numbers"]}, status=400)
+
+    stops = day_stops(videur, day)
+    tour = plan_tour(stops, tour_start(day, stops, start_time), origin=origin)
+    return Response({"videur": videur.id, "date": day.isoformat(), **tour})
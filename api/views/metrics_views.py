@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from api.metrics import render
+
+
+@require_GET
+def metrics(request):
+    """Prometheus text exposition (a plain Django view: no JWT, METRICS_TOKEN bearer).
+
+    Without a METRICS_TOKEN it is only served in DEBUG: the metrics expose traffic and
+    OTP volumes.
+    """
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        return HttpResponse(status=404)
+    body, content_type = render()
+    return HttpResponse(body, content_type=content_type)
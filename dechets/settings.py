@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import json
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -51,7 +52,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestIdMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
 ]
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -95,6 +102,34 @@ DATABASES = {
     }
 }
 
+# Read replica for the @use_replica dashboard views (api/db_router.py). Locally, point
+# DATABASE_REPLICA_NAME at a second SQLite file and run `migrate --database replica`.
+REPLICA_DATABASE = "replica"
+if os.getenv("DATABASE_REPLICA_NAME"):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("DATABASE_REPLICA_NAME"),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ["api.db_router.ReplicaRouter"]
+# seconds a user who wrote keeps reading from the primary (kept in the default cache:
+# a replica needs REDIS_URL, see api/checks.py)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# locmem (per process) unless REDIS_URL points at a shared redis
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv("REDIS_URL"),
+    } if os.getenv("REDIS_URL") else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -130,7 +165,106 @@ META_PHONE_ID = os.getenv("META_PHONE_ID")
 META_WHATSAPP_API_KEY = os.getenv("META_WHATSAPP_API_KEY")
 OTP_EXPIRATION_SECONDS = int(os.getenv("OTP_EXPIRATION_SECONDS", 300))
 OTP_SEND_COOLDOWN_SECONDS = int(os.getenv("OTP_SEND_COOLDOWN_SECONDS", 60))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", 5))
+# "cache" keeps OTPs in CACHES[OTP_CACHE_ALIAS] (needs a shared backend such as redis with
+# several workers), "db" uses the OTP table (api/services/otp_store.py)
+OTP_STORE = os.getenv("OTP_STORE", "cache" if os.getenv("REDIS_URL") else "db")
+OTP_CACHE_ALIAS = os.getenv("OTP_CACHE_ALIAS", "default")
 META_WA_TOKEN=os.getenv("META_WA_TOKEN")
+# Meta Graph API HTTP client (api/services/whatsapp.py); point META_GRAPH_URL at `manage.py whatsapp_stub` to test offline
+META_GRAPH_URL = os.getenv("META_GRAPH_URL", "https://graph.facebook.com/v22.0")
+META_HTTP_POOL_SIZE = int(os.getenv("META_HTTP_POOL_SIZE", 20))
+META_HTTP_CONNECT_TIMEOUT = float(os.getenv("META_HTTP_CONNECT_TIMEOUT", 3.05))
+META_HTTP_READ_TIMEOUT = float(os.getenv("META_HTTP_READ_TIMEOUT", 10))
+META_HTTP_RETRIES = int(os.getenv("META_HTTP_RETRIES", 3))
+# number of payments embedded in a serialized subscription (full history: subscription/payments/)
+SUBSCRIPTION_PAYMENTS_LIMIT = int(os.getenv("SUBSCRIPTION_PAYMENTS_LIMIT", 5))
+# WhatsApp outbox (api/services/notify.py, manage.py whatsapp_worker)
+WHATSAPP_OUTBOX_BATCH_SIZE = int(os.getenv("WHATSAPP_OUTBOX_BATCH_SIZE", 50))
+WHATSAPP_OUTBOX_CONCURRENCY = int(os.getenv("WHATSAPP_OUTBOX_CONCURRENCY", 8))
+WHATSAPP_OUTBOX_MAX_ATTEMPTS = int(os.getenv("WHATSAPP_OUTBOX_MAX_ATTEMPTS", 5))
+WHATSAPP_OUTBOX_BACKOFF_SECONDS = int(os.getenv("WHATSAPP_OUTBOX_BACKOFF_SECONDS", 30))
+WHATSAPP_OUTBOX_LEASE_SECONDS = int(os.getenv("WHATSAPP_OUTBOX_LEASE_SECONDS", 120))
+# Tour planning (api/services/routing.py)
+ROUTE_AVERAGE_SPEED_KMH = float(os.getenv("ROUTE_AVERAGE_SPEED_KMH", 25))
+ROUTE_SERVICE_MINUTES = float(os.getenv("ROUTE_SERVICE_MINUTES", 5))
+ROUTE_MATRIX_CACHE_SIZE = int(os.getenv("ROUTE_MATRIX_CACHE_SIZE", 32))
+# Size of the Subscription.geo_cell grid; run `manage.py rebuild_geo_cells` after changing it
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", 0.01))
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", 50))
+# Max operations per collectes/sync/ request
+COLLECTE_SYNC_MAX_OPS = int(os.getenv("COLLECTE_SYNC_MAX_OPS", 500))
+# changes/ feed (api/services/changes.py): rows per model and page, re-read window for
+# transactions committed after the watermark, and how long tombstones are kept
+SYNC_FEED_LIMIT = int(os.getenv("SYNC_FEED_LIMIT", 200))
+SYNC_WATERMARK_OVERLAP_SECONDS = int(os.getenv("SYNC_WATERMARK_OVERLAP_SECONDS", 5))
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+# Authenticated user cache (api/authentication.py): only with a shared cache (redis), since an
+# update must invalidate the entry for every worker. Shared entries live AUTH_USER_CACHE_TIMEOUT
+# seconds; the per-process copy AUTH_USER_CACHE_LOCAL_TTL seconds (0 disables it), which bounds
+# how long another process may see a user / subscription after it changed
+AUTH_USER_CACHE = os.getenv("AUTH_USER_CACHE", "1" if os.getenv("REDIS_URL") else "0") == "1"
+AUTH_USER_CACHE_ALIAS = os.getenv("AUTH_USER_CACHE_ALIAS", "default")
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 300))
+AUTH_USER_CACHE_LOCAL_TTL = float(os.getenv("AUTH_USER_CACHE_LOCAL_TTL", 5))
+AUTH_USER_CACHE_LOCAL_SIZE = int(os.getenv("AUTH_USER_CACHE_LOCAL_SIZE", 10000))
+# Per-request SQL instrumentation (api.middleware.QueryInstrumentationMiddleware): share of
+# the requests measured (Server-Timing header), budgets by URL name ("default" applies to
+# all; "queries" per request, "ms" of total time) and runs of one statement logged as an N+1
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv("SQL_INSTRUMENTATION_SAMPLE_RATE", 1.0 if DEBUG else 0.05))
+SQL_BUDGETS = json.loads(os.getenv("SQL_BUDGETS", "{}")) or {
+    "default": {"queries": 20, "ms": 500},
+    "list_changes": {"queries": 15, "ms": 1000},
+    "sync_collectes": {"queries": 30, "ms": 2000},
+    "create_broadcast": {"queries": 30, "ms": 2000},
+}
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+# /metrics (api/metrics.py): scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; unset,
+# /metrics is only served with DEBUG on.
+# Set PROMETHEUS_MULTIPROC_DIR in the environment to aggregate the gunicorn workers.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# cProfile captures (api.middleware.ProfilingMiddleware): the last PROFILE_RING_SIZE are kept in
+# PROFILE_DIR. PROFILE_SAMPLE_RATE of the requests are also profiled and kept when slower than
+# the PROFILE_SLOW_QUANTILE of the recent requests (0 disables automatic capture)
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", 50))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_SLOW_QUANTILE = float(os.getenv("PROFILE_SLOW_QUANTILE", 0.999))
+# Slow-query log (api.middleware.SlowQueryMiddleware, slow-queries/, `manage.py slow_queries`):
+# statements slower than SLOW_QUERY_MS (0 disables it), at most SLOW_QUERY_MAX_FINGERPRINTS kept
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", 500))
+# Logging (api/logs.py): JSON lines on LOG_STREAM ("stderr" or "stdout") written by a background
+# thread from a queue of LOG_QUEUE_SIZE records (dropped when full). stderr keeps them out of the
+# JSON that commands such as bench_endpoints print. LOG_SAMPLING keeps a share of the records
+# below ERROR of high-volume loggers, e.g. {"django.request": 0.1} for the 4xx warnings
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_STREAM = os.getenv("LOG_STREAM", "stderr")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_SAMPLING = json.loads(os.getenv("LOG_SAMPLING", "{}")) or ({} if DEBUG else {"django.request": 0.1})
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"json": {"()": "api.logs.JSONFormatter"}},
+    "filters": {
+        "request_id": {"()": "api.logs.RequestIdFilter"},
+        "sampling": {"()": "api.logs.SamplingFilter"},
+    },
+    "handlers": {
+        "background": {
+            "class": "api.logs.BackgroundHandler",
+            "stream": f"ext://sys.{LOG_STREAM}",
+            "queue_size": LOG_QUEUE_SIZE,
+            "formatter": "json",
+            "filters": ["request_id", "sampling"],
+        },
+    },
+    "root": {"handlers": ["background"], "level": LOG_LEVEL},
+    "loggers": {
+        # replaces Django's console / mail_admins handlers
+        "django": {"handlers": ["background"], "level": LOG_LEVEL, "propagate": False},
+    },
+}
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 SIMPLE_JWT = {
@@ -140,9 +274,9 @@ SIMPLE_JWT = {
 }
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
-      "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+      "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
     'DEFAULT_SCHEMA_CLASS' : 'drf_spectacular.openapi.AutoSchema' , 
     
@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
+from api.views.metrics_views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path("metrics", metrics, name="metrics"),
     path("api/", include("api.urls"))
 
 ]